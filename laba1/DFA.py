@@ -1,4 +1,280 @@
 import csv
+import sys
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class CompiledDFA:
+    """
+    ДКА, скомпилированный в плоскую таблицу переходов над целыми числами.
+    """
+
+    def __init__(self, states, alphabet, transitions, start_state, final_states):
+        # Нумеруем символы алфавита. Ещё два столбца отводятся под символы,
+        # не входящие в алфавит, и под "заглушку", которой дополняются
+        # короткие цепочки при пакетной проверке (по ней каждое состояние
+        # переходит само в себя).
+        self.symbol_ids = {symbol: i for i, symbol in enumerate(alphabet)}
+        self.unknown = len(self.symbol_ids)
+        self.pad = self.unknown + 1
+        self.width = self.unknown + 2
+
+        # Нумеруем состояния. Строка 0 - "мёртвое" состояние, из которого
+        # все переходы ведут в него же.
+        self.state_ids = {}
+        for state in (start_state, *states):
+            if state not in self.state_ids:
+                self.state_ids[state] = len(self.state_ids) + 1
+
+        # В таблице хранится не номер следующего состояния, а смещение его
+        # строки, чтобы на каждом шаге обходиться одним сложением.
+        self.table = array('i', [0]) * ((len(self.state_ids) + 1) * self.width)
+        for row in range(0, len(self.table), self.width):
+            self.table[row + self.pad] = row
+        for (state, symbol), next_state in transitions.items():
+            row = self.state_ids[state] * self.width
+            self.table[row + self.symbol_ids[symbol]] = self.state_ids[next_state] * self.width
+
+        self.start = self.state_ids[start_state] * self.width
+        self.accepting = bytearray(len(self.state_ids) + 1)
+        for state in final_states:
+            if state in self.state_ids:
+                self.accepting[self.state_ids[state]] = 1
+
+        # Таблица перевода байтов в номера символов (только если все символы
+        # алфавита - одиночные символы latin-1).
+        self.byte_table = None
+        if self.width <= 256 and all(len(symbol) == 1 and ord(symbol) < 256 for symbol in alphabet):
+            byte_table = bytearray([self.unknown]) * 256
+            for symbol, i in self.symbol_ids.items():
+                byte_table[ord(symbol)] = i
+            self.byte_table = bytes(byte_table)
+
+        self._np_table = None
+        self._np_accepting = None
+
+    def encode(self, data):
+        """
+        Переводит цепочку (str или bytes) в последовательность номеров символов.
+        Возвращает None, если цепочка заведомо содержит символ не из алфавита.
+        """
+        if self.byte_table is None:
+            return [self.symbol_ids.get(symbol, self.unknown) for symbol in data]
+        if isinstance(data, str):
+            try:
+                data = data.encode('latin-1')
+            except UnicodeEncodeError:
+                return None
+        elif not isinstance(data, (bytes, bytearray)):
+            data = bytes(data)
+        return data.translate(self.byte_table)
+
+    def process(self, input_string):
+        codes = self.encode(input_string)
+        if codes is None:
+            return False
+        table = self.table
+        state = self.start
+        for code in codes:
+            state = table[state + code]
+        return bool(self.accepting[state // self.width])
+
+    def process_many(self, strings, batch_size=4096):
+        """
+        Проверяет много цепочек сразу и возвращает массив результатов:
+        массив NumPy типа bool, а без NumPy - array('b') из 0 и 1 (цепочки
+        тогда проверяются по одной). Цепочки пакета продвигаются по таблице
+        одновременно (fancy indexing NumPy).
+        """
+        if np is None:
+            return array('b', (self.process(string) for string in strings))
+
+        results = []
+        batch = []
+        for string in strings:
+            batch.append(string)
+            if len(batch) == batch_size:
+                results.append(self._process_batch(batch))
+                batch = []
+        if batch:
+            results.append(self._process_batch(batch))
+        if not results:
+            return np.zeros(0, dtype=bool)
+        return np.concatenate(results)
+
+    # Наибольшее число клеток матрицы символов одной группы пакета
+    MAX_GROUP_CELLS = 1 << 24
+    # Группы меньшего размера проверяются поштучно
+    MIN_GROUP_SIZE = 8
+
+    def _process_batch(self, batch):
+        codes = []
+        for string in batch:
+            encoded = self.encode(string)
+            codes.append([self.unknown] if encoded is None else encoded)
+        results = np.zeros(len(codes), dtype=bool)
+
+        # Цепочки сортируются по длине и делятся на группы с длинами одного
+        # порядка (в пределах степени двойки), поэтому дополнение заглушкой
+        # не больше самих данных, а одна длинная цепочка не раздувает матрицу.
+        order = sorted(range(len(codes)), key=lambda index: len(codes[index]))
+        group = []
+        for index in order:
+            length = len(codes[index])
+            if group and (
+                length.bit_length() != len(codes[group[0]]).bit_length()
+                or (len(group) + 1) * length > self.MAX_GROUP_CELLS
+            ):
+                self._process_group(codes, group, results)
+                group = []
+            group.append(index)
+        if group:
+            self._process_group(codes, group, results)
+        return results
+
+    def _process_group(self, codes, group, results):
+        table = self.table
+        if len(group) < self.MIN_GROUP_SIZE:
+            for index in group:
+                state = self.start
+                for code in codes[index]:
+                    state = table[state + code]
+                results[index] = self.accepting[state // self.width]
+            return
+
+        group_codes = [codes[index] for index in group]
+        lengths = np.fromiter((len(c) for c in group_codes), dtype=np.intp, count=len(group_codes))
+
+        # Матрица символов (цепочка x позиция); позиции за концом цепочки
+        # заполняются "заглушкой". Номера символов хранятся в одном байте,
+        # если помещаются.
+        dtype = np.uint8 if self.pad < 256 else np.int32
+        matrix = np.full((len(group_codes), int(lengths.max())), self.pad, dtype=dtype)
+        mask = np.arange(matrix.shape[1]) < lengths[:, None]
+        if self.byte_table is not None:
+            matrix[mask] = np.frombuffer(b''.join(bytes(c) for c in group_codes), dtype=np.uint8)
+        else:
+            matrix[mask] = np.fromiter((code for c in group_codes for code in c), dtype=dtype)
+        matrix = np.ascontiguousarray(matrix.T)
+
+        if self._np_table is None:
+            self._np_table = np.array(self.table, dtype=np.intp)
+            self._np_accepting = np.frombuffer(bytes(self.accepting), dtype=np.uint8).astype(bool)
+        np_table = self._np_table
+        states = np.full(len(group_codes), self.start, dtype=np.intp)
+        for column in matrix:
+            states = np_table[states + column]
+        results[group] = self._np_accepting[states // self.width]
+
+    def run_stream(self, stream, delimiter=b'\n', chunk_size=1 << 20):
+        """
+        Проверяет записи, разделённые delimiter, в потоке байтов, не загружая
+        его целиком в память. stream - открытый бинарный файл, mmap или
+        итератор кусков bytes. Выдаёт результат проверки каждой записи.
+        """
+        runner = DFAStreamRunner(self, delimiter)
+        if hasattr(stream, 'read'):
+            chunks = iter(lambda: stream.read(chunk_size), b'')
+        else:
+            chunks = stream
+        for chunk in chunks:
+            yield from runner.feed(chunk)
+        result = runner.finish()
+        if result is not None:
+            yield result
+
+    def iter_records(self, buffer, delimiter=b'\n'):
+        """
+        Проверяет записи прямо в буфере (bytes, bytearray, mmap, memoryview)
+        без декодирования и копирования. Выдаёт тройки (начало, конец,
+        результат) с байтовыми смещениями записей.
+        """
+        if self.byte_table is None:
+            raise ValueError("Проверка байтов требует алфавита из однобайтовых символов")
+        if len(delimiter) != 1:
+            raise ValueError("Разделитель записей должен состоять из одного байта")
+        separator = delimiter[0]
+        table = self.table
+        byte_table = self.byte_table
+        with memoryview(buffer) as view, view.cast('B') as data:
+            state = self.start
+            start = 0
+            for position, byte in enumerate(data):
+                if byte == separator:
+                    yield start, position, bool(self.accepting[state // self.width])
+                    state = self.start
+                    start = position + 1
+                else:
+                    state = table[state + byte_table[byte]]
+            if start < len(data):
+                yield start, len(data), bool(self.accepting[state // self.width])
+
+
+class DFAStreamRunner:
+    """
+    Возобновляемый прогон ДКА по потоку байтов, поступающему кусками.
+    Текущее состояние переносится через границы кусков, поэтому запись может
+    начинаться в одном куске и заканчиваться в другом.
+    """
+
+    def __init__(self, compiled, delimiter=b'\n'):
+        if compiled.byte_table is None:
+            raise ValueError("Потоковая проверка требует алфавита из однобайтовых символов")
+        if delimiter is not None and len(delimiter) != 1:
+            raise ValueError("Разделитель записей должен состоять из одного байта")
+        self.compiled = compiled
+        self.delimiter = delimiter
+        self.state = compiled.start
+        self.in_record = False
+
+    def feed(self, chunk):
+        """
+        Обрабатывает очередной кусок и возвращает результаты записей,
+        завершившихся в нём.
+        """
+        if not isinstance(chunk, (bytes, bytearray)):
+            chunk = bytes(chunk)
+        compiled = self.compiled
+        table = compiled.table
+        codes = chunk.translate(compiled.byte_table)
+        state = self.state
+        results = []
+        pos = 0
+
+        if self.delimiter is not None:
+            while True:
+                end = chunk.find(self.delimiter, pos)
+                if end < 0:
+                    break
+                for code in codes[pos:end]:
+                    state = table[state + code]
+                results.append(bool(compiled.accepting[state // compiled.width]))
+                state = compiled.start
+                self.in_record = False
+                pos = end + 1
+
+        if pos < len(codes):
+            for code in codes[pos:]:
+                state = table[state + code]
+            self.in_record = True
+        self.state = state
+        return results
+
+    def finish(self):
+        """
+        Завершает поток. Возвращает результат последней записи без
+        завершающего разделителя (или None, если такой записи нет).
+        """
+        result = None
+        if self.in_record or self.delimiter is None:
+            result = bool(self.compiled.accepting[self.state // self.compiled.width])
+        self.state = self.compiled.start
+        self.in_record = False
+        return result
 
 
 class DFA:
@@ -8,15 +284,33 @@ class DFA:
         self.transitions = transitions
         self.start_state = start_state
         self.final_states = final_states
+        self.compiled = None
+
+    def compile(self):
+        self.compiled = CompiledDFA(
+            self.states, self.alphabet, self.transitions, self.start_state, self.final_states
+        )
+        return self.compiled
 
     def process(self, input_string):
-        current_state = self.start_state
-        for symbol in input_string:
-            if (current_state, symbol) in self.transitions:
-                current_state = self.transitions[(current_state, symbol)]
-            else:
-                return False
-        return current_state in self.final_states
+        if self.compiled is None:
+            self.compile()
+        return self.compiled.process(input_string)
+
+    def process_many(self, strings):
+        if self.compiled is None:
+            self.compile()
+        return self.compiled.process_many(strings)
+
+    def run_stream(self, stream, delimiter=b'\n', chunk_size=1 << 20):
+        if self.compiled is None:
+            self.compile()
+        return self.compiled.run_stream(stream, delimiter, chunk_size)
+
+    def iter_records(self, buffer, delimiter=b'\n'):
+        if self.compiled is None:
+            self.compile()
+        return self.compiled.iter_records(buffer, delimiter)
 
 
 def read_dfa_from_csv(file_path):
@@ -47,6 +341,13 @@ def main():
     file_path = 'C:\\Users\\artyo\\PycharmProjects\\AppliedAlgorithms2\\laba1\\input_file.csv'
     dfa = read_dfa_from_csv(file_path)
 
+    # Построчная проверка файла, переданного в командной строке
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], 'rb') as f:
+            for line_number, accepted in enumerate(dfa.run_stream(f), 1):
+                print(f"{line_number}: {'допускается' if accepted else 'не допускается'}")
+        return
+
     # Ввод и проверка цепочек
     while True:
         input_string = input("Введите цепочку для проверки (или 'exit' для выхода): ")
@@ -1,4 +1,5 @@
 from laba2.test import transitions
+from laba3.subset_construction import BitsetNFA, LazyDFA, determinize
 
 
 class NFA:
@@ -7,43 +8,62 @@ class NFA:
         self.start_state = start_state
         self.accept_states = accept_states
 
-    def _epsilon_closure(self, states):
-        stack = list(states)
-        closure = set(states)
+        # Нумерация состояний целыми числами; эпсилон-замыкания вычисляются
+        # один раз, а множества состояний хранятся битовыми масками
+        states = [start_state]
+        state_ids = {start_state: 0}
+        edges = []
+        for (state, symbol), next_states in transitions.items():
+            for name in (state, *next_states):
+                if name not in state_ids:
+                    state_ids[name] = len(states)
+                    states.append(name)
+            for next_state in next_states:
+                edges.append((state_ids[state], None if symbol == "e" else symbol, state_ids[next_state]))
+        self.automaton = BitsetNFA(
+            states,
+            0,
+            [state_ids[state] for state in accept_states if state in state_ids],
+            edges,
+        )
+        self.alphabet = self.automaton.alphabet
 
-        while stack:
-            state = stack.pop()
-            for next_state in self.transitions.get((state, "e"), []):
-                if next_state not in closure:
-                    closure.add(next_state)
-                    stack.append(next_state)
-        return closure
+    def to_dfa(self):
+        # Построение эквивалентного ДКА (laba3) методом подмножеств
+        return determinize(self.automaton)
+
+    def lazy_dfa(self, max_states=10000):
+        # ДКА, строящийся по требованию, с ограниченным кэшем состояний
+        return LazyDFA(self.automaton, max_states)
 
     def accepts_substring(self, string):
-        for start_pos in range(len(string)):
-            if self._accepts_from_position(string[start_pos:]):
-                return True
+        # Однопроходный поиск (автомат Σ*·N): на каждой позиции к текущему
+        # множеству добавляется замыкание начального состояния, поэтому
+        # одновременно отслеживаются подстроки, начинающиеся во всех позициях.
+        for _ in self.match_ends(string):
+            return True
         return False
 
-    def _accepts_from_position(self, substring):
-        current_states = self._epsilon_closure({self.start_state})
-
-        for symbol in substring:
-            next_states = set()
-            for state in current_states:
-                next_states.update(self.transitions.get((state, symbol), []))
-            current_states = self._epsilon_closure(next_states)
-            if any(state in self.accept_states for state in current_states):
-                return True
-
-        return any(state in self.accept_states for state in current_states)
+    def match_ends(self, string):
+        """
+        Генератор позиций end, для которых некоторая непустая подстрока
+        string[start:end] допускается автоматом.
+        """
+        automaton = self.automaton
+        start_states = automaton.start
+        current_states = 0
 
+        for position, symbol in enumerate(string):
+            current_states = automaton.step(current_states | start_states, symbol)
+            if current_states & automaton.accept_mask:
+                yield position + 1
 
 
-nfa = NFA(transitions=transitions, start_state="q0", accept_states={"q6", "q7"})
+if __name__ == "__main__":
+    nfa = NFA(transitions=transitions, start_state="q0", accept_states={"q6", "q7"})
 
-print(nfa.accepts_substring("01"))
-print(nfa.accepts_substring("0110"))
-print(nfa.accepts_substring("01101"))
-print(nfa.accepts_substring("010"))
-print(nfa.accepts_substring("101100011"))
+    print(nfa.accepts_substring("01"))
+    print(nfa.accepts_substring("0110"))
+    print(nfa.accepts_substring("01101"))
+    print(nfa.accepts_substring("010"))
+    print(nfa.accepts_substring("101100011"))
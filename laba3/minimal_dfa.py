@@ -1,4 +1,6 @@
-from typing import Set, Dict, Tuple, List, FrozenSet
+from typing import Iterable, Set, Dict, Tuple, List, FrozenSet
+
+from laba1.DFA import CompiledDFA
 
 class DFA:
     def __init__(
@@ -14,52 +16,105 @@ class DFA:
         self.transition_function = transition_function
         self.start_state = start_state
         self.final_states = final_states
+        self.compiled = None
+
+    def compile(self) -> CompiledDFA:
+        self.compiled = CompiledDFA(
+            self.states, self.alphabet, self.transition_function, self.start_state, self.final_states
+        )
+        return self.compiled
+
+    def process(self, input_string: str) -> bool:
+        if self.compiled is None:
+            self.compile()
+        return self.compiled.process(input_string)
+
+    def process_many(self, strings: Iterable[str]):
+        if self.compiled is None:
+            self.compile()
+        return self.compiled.process_many(strings)
 
     def minimize(self) -> 'DFA':
 
-        partition: List[Set[str]] = [self.final_states, self.states - self.final_states]
-        work_list: List[Set[str]] = [self.final_states]
+        # Удаляем недостижимые состояния и нумеруем оставшиеся
+        index: Dict[str, int] = {self.start_state: 0}
+        states: List[str] = [self.start_state]
+        stack = [self.start_state]
+        while stack:
+            state = stack.pop()
+            for symbol in self.alphabet:
+                target = self.transition_function.get((state, symbol))
+                if target is not None and target not in index:
+                    index[target] = len(states)
+                    states.append(target)
+                    stack.append(target)
+
+        # Отсутствующие переходы ведут в неявное "мёртвое" состояние sink
+        sink = len(states)
+        inverse: List[Dict[int, List[int]]] = []
+        for symbol in self.alphabet:
+            preimage: Dict[int, List[int]] = {sink: [sink]}
+            for i, state in enumerate(states):
+                target = self.transition_function.get((state, symbol))
+                preimage.setdefault(sink if target is None else index[target], []).append(i)
+            inverse.append(preimage)
+
+        finals = {index[state] for state in self.final_states if state in index}
+        blocks: List[Set[int]] = [group for group in (set(finals), set(range(sink + 1)) - finals) if group]
+        block_of: List[int] = [0] * (sink + 1)
+        for b, group in enumerate(blocks):
+            for i in group:
+                block_of[i] = b
+
+        work_list: List[int] = []
+        in_work: Set[int] = set()
+        if len(blocks) == 2:
+            smaller = 0 if len(blocks[0]) <= len(blocks[1]) else 1
+            work_list.append(smaller)
+            in_work.add(smaller)
 
         while work_list:
-            A = work_list.pop()
-            for symbol in self.alphabet:
-                X = {state for state in self.states if self.transition_function.get((state, symbol)) in A}
-
-                new_P = []
-                for Y in partition:
-                    intersection = Y.intersection(X)
-                    difference = Y.difference(X)
-
-                    if intersection and difference:
-                        new_P.append(intersection)
-                        new_P.append(difference)
-
-                        if Y in work_list:
-                            work_list.remove(Y)
-                            work_list.append(intersection)
-                            work_list.append(difference)
-                        else:
-                            if len(intersection) <= len(difference):
-                                work_list.append(intersection)
-                            else:
-                                work_list.append(difference)
+            a = work_list.pop()
+            in_work.discard(a)
+            splitter = list(blocks[a])
+            for preimage in inverse:
+                touched: Dict[int, List[int]] = {}
+                for q in splitter:
+                    for p in preimage.get(q, ()):
+                        touched.setdefault(block_of[p], []).append(p)
+
+                for b, members in touched.items():
+                    if len(members) == len(blocks[b]):
+                        continue
+                    new = len(blocks)
+                    moved = set(members)
+                    blocks[b] -= moved
+                    blocks.append(moved)
+                    for p in members:
+                        block_of[p] = new
+
+                    if b in in_work or len(moved) <= len(blocks[b]):
+                        work_list.append(new)
+                        in_work.add(new)
                     else:
-                        new_P.append(Y)
+                        work_list.append(b)
+                        in_work.add(b)
 
-                partition = new_P
+        groups: List[FrozenSet[str]] = [
+            frozenset(states[i] for i in group if i != sink) for group in blocks
+        ]
 
-        new_states = {frozenset(group) for group in partition}
-        new_start_state = next(frozenset(group) for group in partition if self.start_state in group)
-        new_final_states = {frozenset(group) for group in partition if group & self.final_states}
+        new_states = {group for group in groups if group}
+        new_start_state = groups[block_of[0]]
+        new_final_states = {groups[block_of[i]] for i in finals}
 
         new_transition_function = {}
-        for group in partition:
+        for group in new_states:
             representative = next(iter(group))
             for symbol in self.alphabet:
                 target = self.transition_function.get((representative, symbol))
-                if target:
-                    target_group = next(frozenset(g) for g in partition if target in g)
-                    new_transition_function[(frozenset(group), symbol)] = frozenset(target_group)
+                if target is not None:
+                    new_transition_function[(group, symbol)] = groups[block_of[index[target]]]
 
         return DFA(
             states=new_states,
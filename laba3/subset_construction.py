@@ -0,0 +1,273 @@
+import threading
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Optional, Set, Tuple
+
+from laba3.minimal_dfa import DFA
+
+
+# НКА, передаваемый в функции модуля, должен предоставлять:
+#   alphabet                 - множество символов (без эпсилон);
+#   start_closure()          - эпсилон-замыкание начального состояния;
+#   step(states, symbol)     - эпсилон-замыкание переходов из states по symbol;
+#   is_accepting(states)     - есть ли среди states допускающее;
+#   state_set(states)        - множество меток состояний (для имён состояний ДКА).
+# Множество состояний может быть любым хешируемым значением; пустое
+# множество должно быть ложным значением.
+
+
+def iter_bits(mask: int) -> List[int]:
+    """Номера установленных битов маски в порядке возрастания."""
+    bits = []
+    while mask:
+        lowest = mask & -mask
+        bits.append(lowest.bit_length() - 1)
+        mask ^= lowest
+    return bits
+
+
+def epsilon_closures(epsilon: List[List[int]]) -> List[int]:
+    """
+    Эпсилон-замыкания всех состояний 0..n-1 в виде битовых масок.
+    Граф эпсилон-переходов разбивается на компоненты сильной связности
+    (алгоритм Тарьяна), и замыкание каждой компоненты вычисляется один раз
+    по уже готовым замыканиям последующих компонент, поэтому циклы
+    (звезда Клини) обрабатываются за линейное время.
+    """
+    n = len(epsilon)
+    index = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    closures = [0] * n
+    stack: List[int] = []
+    counter = 0
+
+    for root in range(n):
+        if index[root] >= 0:
+            continue
+        work = [(root, 0)]
+        while work:
+            v, i = work.pop()
+            edges = epsilon[v]
+            if i == 0:
+                index[v] = low[v] = counter
+                counter += 1
+                stack.append(v)
+                on_stack[v] = True
+            else:
+                # Возврат из потомка edges[i - 1]
+                low[v] = min(low[v], low[edges[i - 1]])
+
+            descended = False
+            while i < len(edges):
+                w = edges[i]
+                i += 1
+                if index[w] < 0:
+                    work.append((v, i))
+                    work.append((w, 0))
+                    descended = True
+                    break
+                if on_stack[w]:
+                    low[v] = min(low[v], index[w])
+            if descended or low[v] != index[v]:
+                continue
+
+            # v - корень компоненты: замыкание общее для всех её вершин
+            members = []
+            mask = 0
+            while True:
+                w = stack.pop()
+                on_stack[w] = False
+                members.append(w)
+                mask |= 1 << w
+                if w == v:
+                    break
+            for w in members:
+                for target in epsilon[w]:
+                    mask |= closures[target]
+            for w in members:
+                closures[w] = mask
+
+    return closures
+
+
+class BitsetNFA:
+    """
+    НКА над состояниями 0..n-1 с заранее вычисленными эпсилон-замыканиями.
+    Множества состояний представлены битовыми масками int, а шаг автомата
+    сводится к объединению готовых масок.
+    """
+
+    def __init__(
+        self,
+        labels: List[Hashable],
+        start: int,
+        accepting: Iterable[int],
+        edges: Iterable[Tuple[int, Optional[str], int]],
+    ):
+        # edges - тройки (откуда, символ, куда); символ None - эпсилон-переход
+        self.labels = labels
+        n = len(labels)
+        epsilon: List[List[int]] = [[] for _ in range(n)]
+        symbol_edges = []
+        for source, symbol, target in edges:
+            if symbol is None:
+                epsilon[source].append(target)
+            else:
+                symbol_edges.append((source, symbol, target))
+
+        self.closures = epsilon_closures(epsilon)
+        # moves[symbol][state] - замыкание состояний, достижимых из state по symbol;
+        # sources[symbol] - маска состояний, имеющих переход по symbol
+        self.moves: Dict[str, Dict[int, int]] = {}
+        self.sources: Dict[str, int] = {}
+        for source, symbol, target in symbol_edges:
+            moves = self.moves.setdefault(symbol, {})
+            moves[source] = moves.get(source, 0) | self.closures[target]
+            self.sources[symbol] = self.sources.get(symbol, 0) | (1 << source)
+
+        self.alphabet: Set[str] = set(self.moves)
+        self.start = self.closures[start]
+        self.accept_mask = 0
+        for state in accepting:
+            self.accept_mask |= 1 << state
+
+    def start_closure(self) -> int:
+        return self.start
+
+    def step(self, states: int, symbol: str) -> int:
+        states &= self.sources.get(symbol, 0)
+        if not states:
+            return 0
+        moves = self.moves[symbol]
+        next_states = 0
+        while states:
+            lowest = states & -states
+            next_states |= moves[lowest.bit_length() - 1]
+            states ^= lowest
+        return next_states
+
+    def is_accepting(self, states: int) -> bool:
+        return bool(states & self.accept_mask)
+
+    def state_set(self, states: int) -> FrozenSet:
+        return frozenset(self.labels[state] for state in iter_bits(states))
+
+
+def determinize(nfa) -> DFA:
+    """
+    Построение ДКА по НКА (построение подмножеств). Состояниями ДКА являются
+    frozenset состояний НКА; переходы в пустое множество не сохраняются.
+    """
+    start = nfa.start_closure()
+    states: Set[Hashable] = {start}
+    stack = [start]
+    transitions: Dict[Tuple[Hashable, str], Hashable] = {}
+
+    while stack:
+        current = stack.pop()
+        for symbol in nfa.alphabet:
+            target = nfa.step(current, symbol)
+            if not target:
+                continue
+            transitions[(current, symbol)] = target
+            if target not in states:
+                states.add(target)
+                stack.append(target)
+
+    names = {state: nfa.state_set(state) for state in states}
+    return DFA(
+        states=set(names.values()),
+        alphabet=set(nfa.alphabet),
+        transition_function={
+            (names[source], symbol): names[target] for (source, symbol), target in transitions.items()
+        },
+        start_state=names[start],
+        final_states={names[state] for state in states if nfa.is_accepting(state)},
+    )
+
+
+class LazyDFACache:
+    """Таблицы одного поколения кэша LazyDFA."""
+    __slots__ = ('ids', 'sets', 'accepting', 'transitions', 'start')
+
+    def __init__(self):
+        self.ids: Dict[Hashable, int] = {}
+        self.sets: List[Hashable] = []
+        self.accepting: List[bool] = []
+        self.transitions: List[Dict[Hashable, int]] = []
+        self.start = LazyDFA.DEAD
+
+
+class LazyDFA:
+    """
+    ДКА, состояния которого строятся по требованию во время прогона и
+    запоминаются в кэше (ключ - множество состояний НКА). Размер кэша
+    ограничен: при переполнении он сбрасывается целиком.
+
+    Один LazyDFA можно использовать из нескольких потоков: НКА не
+    изменяется, таблицы кэша только дополняются (под блокировкой), а при
+    сбросе создаётся новое поколение таблиц, так что прогоны, начатые на
+    старом, завершаются на нём же.
+    """
+
+    DEAD = -1
+
+    def __init__(self, nfa, max_states: int = 10000):
+        self.nfa = nfa
+        self.max_states = max_states
+        self.flushes = 0
+        self._lock = threading.Lock()
+        self.cache = self._new_cache()
+
+    def _new_cache(self) -> LazyDFACache:
+        cache = LazyDFACache()
+        cache.start = self._intern(cache, self.nfa.start_closure())
+        return cache
+
+    def _intern(self, cache: LazyDFACache, states: Hashable) -> int:
+        if not states:
+            return self.DEAD
+        state_id = cache.ids.get(states)
+        if state_id is None:
+            state_id = len(cache.sets)
+            cache.sets.append(states)
+            cache.accepting.append(self.nfa.is_accepting(states))
+            cache.transitions.append({})
+            cache.ids[states] = state_id
+        return state_id
+
+    def next_state(self, cache: LazyDFACache, state_id: int, symbol: str) -> Tuple[LazyDFACache, int]:
+        """
+        Переход из состояния state_id по символу. Идентификаторы состояний
+        действительны только в своём поколении кэша, поэтому возвращается
+        пара (поколение, состояние).
+        """
+        target_id = cache.transitions[state_id].get(symbol)
+        if target_id is not None:
+            return cache, target_id
+
+        source = cache.sets[state_id]
+        target = self.nfa.step(source, symbol)
+        with self._lock:
+            if cache is not self.cache:
+                # Поколение уже заменено другим потоком: переход записывается в текущее
+                cache = self.cache
+                state_id = self._intern(cache, source)
+            if target and target not in cache.ids and len(cache.sets) >= self.max_states:
+                self.flushes += 1
+                cache = self.cache = self._new_cache()
+                state_id = self._intern(cache, source)
+            target_id = self._intern(cache, target)
+            cache.transitions[state_id][symbol] = target_id
+        return cache, target_id
+
+    def accepts(self, string) -> bool:
+        cache = self.cache
+        state = cache.start
+        for symbol in string:
+            if state == self.DEAD:
+                return False
+            target = cache.transitions[state].get(symbol)
+            if target is None:
+                cache, target = self.next_state(cache, state, symbol)
+            state = target
+        return state != self.DEAD and cache.accepting[state]
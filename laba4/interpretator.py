@@ -1,3 +1,12 @@
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from laba3.subset_construction import BitsetNFA, LazyDFA, determinize
+
+
 class State:
     """Класс для представления состояния автомата."""
     def __init__(self, is_final=False):
@@ -21,6 +30,7 @@ class NFA:
     @staticmethod
     def concat(nfa1, nfa2):
         """Операция конкатенации двух НКА."""
+        nfa1.accept_state.is_final = False
         nfa1.accept_state.add_transition(None, nfa2.start_state)
         return NFA(nfa1.start_state, nfa2.accept_state)
 
@@ -31,6 +41,8 @@ class NFA:
         accept = State(is_final=True)
         start.add_transition(None, nfa1.start_state)
         start.add_transition(None, nfa2.start_state)
+        nfa1.accept_state.is_final = False
+        nfa2.accept_state.is_final = False
         nfa1.accept_state.add_transition(None, accept)
         nfa2.accept_state.add_transition(None, accept)
         return NFA(start, accept)
@@ -42,6 +54,7 @@ class NFA:
         accept = State(is_final=True)
         start.add_transition(None, nfa.start_state)
         start.add_transition(None, accept)
+        nfa.accept_state.is_final = False
         nfa.accept_state.add_transition(None, nfa.start_state)
         nfa.accept_state.add_transition(None, accept)
         return NFA(start, accept)
@@ -55,36 +68,219 @@ class NFA:
         return NFA(start, accept)
 
 
+class LiteralInfo:
+    """
+    Сведения о литералах регулярного выражения, вычисляемые вместе с НКА:
+    exact - строка, если выражение задаёт ровно её (иначе None);
+    prefix/suffix - с чего начинается/чем заканчивается любое совпадение;
+    required - подстрока, входящая в любое совпадение;
+    max_length - наибольшая длина совпадения (None - не ограничена).
+    """
+    __slots__ = ('exact', 'prefix', 'suffix', 'required', 'max_length')
+
+    def __init__(self, exact, prefix, suffix, required, max_length):
+        self.exact = exact
+        self.prefix = prefix
+        self.suffix = suffix
+        self.required = required
+        self.max_length = max_length
+
+    @staticmethod
+    def concat(info1, info2):
+        """Литералы конкатенации."""
+        if info1.exact is not None and info2.exact is not None:
+            return LiteralInfo.from_string(info1.exact + info2.exact)
+        prefix = info1.exact + info2.prefix if info1.exact is not None else info1.prefix
+        suffix = info1.suffix + info2.exact if info2.exact is not None else info2.suffix
+        required = max(info1.required, info2.required, info1.suffix + info2.prefix, key=len)
+        max_length = None
+        if info1.max_length is not None and info2.max_length is not None:
+            max_length = info1.max_length + info2.max_length
+        return LiteralInfo(None, prefix, suffix, required, max_length)
+
+    @staticmethod
+    def union(info1, info2):
+        """Литералы объединения (a|b)."""
+        if info1.exact is not None and info1.exact == info2.exact:
+            return info1
+        prefix = os.path.commonprefix([info1.prefix, info2.prefix])
+        suffix = os.path.commonprefix([info1.suffix[::-1], info2.suffix[::-1]])[::-1]
+        max_length = None
+        if info1.max_length is not None and info2.max_length is not None:
+            max_length = max(info1.max_length, info2.max_length)
+        return LiteralInfo(None, prefix, suffix, max(prefix, suffix, key=len), max_length)
+
+    @staticmethod
+    def kleene_star(info):
+        """Литералы звезды Клини: обязательных литералов нет."""
+        return LiteralInfo(None, '', '', '', None)
+
+    @staticmethod
+    def from_string(string):
+        return LiteralInfo(string, string, string, string, len(string))
+
+
+class Program:
+    """
+    Компактное представление НКА Томпсона: плоский список инструкций
+    CHAR c, x (переход по символу c), SPLIT x, y (ε-переходы в x и y),
+    JMP x (ε-переход) и MATCH с целочисленными адресами переходов.
+    """
+    __slots__ = ('ops', 'chars', 'x', 'y', 'start')
+
+    CHAR, SPLIT, JMP, MATCH = range(4)
+
+    def __init__(self, ops, chars, x, y, start=0):
+        self.ops = ops  # bytearray кодов операций
+        self.chars = chars  # строка: символ инструкции CHAR, иначе '\0'
+        self.x = x  # array('i') первых адресов
+        self.y = y  # array('i') вторых адресов
+        self.start = start
+
+    def __len__(self):
+        return len(self.ops)
+
+    @staticmethod
+    def compile(nfa):
+        """Перевод графа состояний НКА в список инструкций."""
+        states = [nfa.start_state]
+        state_ids = {nfa.start_state: 0}
+        for state in states:
+            for next_states in state.transitions.values():
+                for next_state in next_states:
+                    if next_state not in state_ids:
+                        state_ids[next_state] = len(states)
+                        states.append(next_state)
+
+        ops = [Program.JMP] * len(states)
+        chars = ['\0'] * len(states)
+        x = [0] * len(states)
+        y = [0] * len(states)
+
+        def emit(op, char='\0', target=0):
+            ops.append(op)
+            chars.append(char)
+            x.append(target)
+            y.append(0)
+            return len(ops) - 1
+
+        for i, state in enumerate(states):
+            # Ветви состояния: (символ, цель); символ None - ε-переход,
+            # цель None - допуск
+            branches = [
+                (symbol, state_ids[next_state])
+                for symbol, next_states in state.transitions.items()
+                for next_state in next_states
+            ]
+            if state.is_final:
+                branches.append((None, None))
+
+            if not branches:
+                # Тупиковое состояние: ε-петля, которая никогда не допускает
+                x[i] = i
+                continue
+            if len(branches) == 1:
+                symbol, target = branches[0]
+                if target is None:
+                    ops[i] = Program.MATCH
+                elif symbol is None:
+                    x[i] = target
+                else:
+                    ops[i], chars[i], x[i] = Program.CHAR, symbol, target
+                continue
+
+            # Несколько ветвей - цепочка инструкций SPLIT
+            targets = []
+            for symbol, target in branches:
+                if target is None:
+                    targets.append(emit(Program.MATCH))
+                elif symbol is None:
+                    targets.append(target)
+                else:
+                    targets.append(emit(Program.CHAR, symbol, target))
+            current = i
+            for k, target in enumerate(targets[:-1]):
+                rest = targets[-1] if k == len(targets) - 2 else emit(Program.SPLIT)
+                ops[current], x[current], y[current] = Program.SPLIT, target, rest
+                current = rest
+
+        return Program(bytearray(ops), ''.join(chars), array('i', x), array('i', y))
+
+    def to_bitset_nfa(self):
+        """НКА над номерами инструкций с заранее вычисленными ε-замыканиями."""
+        edges = []
+        accepting = []
+        for i, op in enumerate(self.ops):
+            if op == Program.CHAR:
+                edges.append((i, self.chars[i], self.x[i]))
+            elif op == Program.SPLIT:
+                edges.append((i, None, self.x[i]))
+                edges.append((i, None, self.y[i]))
+            elif op == Program.JMP:
+                edges.append((i, None, self.x[i]))
+            else:
+                accepting.append(i)
+        return BitsetNFA(list(range(len(self.ops))), self.start, accepting, edges)
+
+    def __str__(self):
+        lines = []
+        for i, op in enumerate(self.ops):
+            if op == Program.CHAR:
+                lines.append(f"{i}: CHAR {self.chars[i]!r} -> {self.x[i]}")
+            elif op == Program.SPLIT:
+                lines.append(f"{i}: SPLIT {self.x[i]}, {self.y[i]}")
+            elif op == Program.JMP:
+                lines.append(f"{i}: JMP {self.x[i]}")
+            else:
+                lines.append(f"{i}: MATCH")
+        return "\n".join(lines)
+
+
 class NFAExecutor:
-    """Исполнитель для симуляции работы НКА над строкой."""
-    def __init__(self, nfa):
-        self.nfa = nfa
+    """
+    Исполнитель для симуляции работы НКА над строкой. Хранится только
+    компактная программа; НКА с ε-замыканиями и ленивый ДКА строятся при
+    первом обращении.
+    """
+    def __init__(self, nfa, max_dfa_states=10000):
+        # Граф состояний переводится в компактную программу; сам граф не сохраняется
+        self.program = nfa if isinstance(nfa, Program) else Program.compile(nfa)
+        self.max_dfa_states = max_dfa_states
+        self._automaton = None
+        self._dfa = None
+        self._lock = threading.Lock()
+
+    @property
+    def automaton(self):
+        """НКА с заранее вычисленными ε-замыканиями и битовыми множествами состояний."""
+        if self._automaton is None:
+            with self._lock:
+                if self._automaton is None:
+                    self._automaton = self.program.to_bitset_nfa()
+        return self._automaton
+
+    @property
+    def alphabet(self):
+        return self.automaton.alphabet
+
+    @property
+    def dfa(self):
+        """ДКА, достраиваемый по мере прогона строк (кэш множеств состояний НКА)."""
+        if self._dfa is None:
+            automaton = self.automaton
+            with self._lock:
+                if self._dfa is None:
+                    self._dfa = LazyDFA(automaton, self.max_dfa_states)
+        return self._dfa
 
     def match(self, text):
         """Проверка, принимает ли НКА строку."""
-        current_states = self._epsilon_closure({self.nfa.start_state})
-        for symbol in text:
-            next_states = set()
-            for state in current_states:
-                if symbol in state.transitions:
-                    for next_state in state.transitions[symbol]:
-                        next_states.add(next_state)
-            current_states = self._epsilon_closure(next_states)
-        # Только если есть финальное состояние в `current_states`, строка считается совпадением
-        return any(state.is_final for state in current_states)
-
-    def _epsilon_closure(self, states):
-        """Находит ε-замыкание множества состояний."""
-        stack = list(states)
-        closure = set(states)
-        while stack:
-            state = stack.pop()
-            if None in state.transitions:
-                for next_state in state.transitions[None]:
-                    if next_state not in closure:
-                        closure.add(next_state)
-                        stack.append(next_state)
-        return closure
+        # Только если есть финальное состояние в текущем множестве, строка считается совпадением
+        return self.dfa.accepts(text)
+
+    def to_dfa(self):
+        """Построение эквивалентного ДКА (laba3) методом подмножеств."""
+        return determinize(self.automaton)
 
 
 class RegexParser:
@@ -92,36 +288,42 @@ class RegexParser:
     def __init__(self, regex):
         self.regex = regex
         self.index = 0
+        self.literals = None
 
     def parse(self):
         """Главная функция для запуска парсинга регулярного выражения."""
-        nfa = self._expression()
+        nfa, self.literals = self._expression()
         if self.index < len(self.regex):
             raise ValueError("Неожиданный символ в регулярном выражении")
         return nfa
 
     def _expression(self):
         """Обработка выражений с поддержкой альтернативы (|)."""
-        nfa = self._term()
+        nfa, info = self._term()
         while self._current_char() == '|':
             self.index += 1
-            nfa = NFA.union(nfa, self._term())
-        return nfa
+            term_nfa, term_info = self._term()
+            nfa = NFA.union(nfa, term_nfa)
+            info = LiteralInfo.union(info, term_info)
+        return nfa, info
 
     def _term(self):
         """Обработка конкатенации."""
-        nfa = self._factor()
+        nfa, info = self._factor()
         while self._current_char() not in {None, '|', ')'}:
-            nfa = NFA.concat(nfa, self._factor())
-        return nfa
+            factor_nfa, factor_info = self._factor()
+            nfa = NFA.concat(nfa, factor_nfa)
+            info = LiteralInfo.concat(info, factor_info)
+        return nfa, info
 
     def _factor(self):
         """Обработка символов и операций звезды Клини (*)."""
-        nfa = self._base()
+        nfa, info = self._base()
         while self._current_char() == '*':
             self.index += 1
             nfa = NFA.kleene_star(nfa)
-        return nfa
+            info = LiteralInfo.kleene_star(info)
+        return nfa, info
 
     def _base(self):
         """Обработка базовых символов и подвыражений в скобках."""
@@ -129,15 +331,15 @@ class RegexParser:
 
         if char == '(':
             self.index += 1
-            nfa = self._expression()
+            result = self._expression()
             if self._current_char() != ')':
                 raise ValueError("Отсутствует закрывающая скобка")
             self.index += 1
-            return nfa
+            return result
 
         if char.isalnum():
             self.index += 1
-            return NFA.from_symbol(char)
+            return NFA.from_symbol(char), LiteralInfo.from_string(char)
 
         raise ValueError(f"Неправильный символ: {char}")
 
@@ -147,38 +349,404 @@ class RegexParser:
         return self.regex[self.index]
 
 
-class NFAPatternMatcher:
+class CompiledPattern:
+    """
+    Скомпилированное регулярное выражение: программа НКА, исполнитель с
+    ленивым ДКА и литералы для фильтрации текста. Поиск идёт прямо по
+    массивам программы; производные таблицы строятся при первом
+    использовании и после этого не изменяются, поэтому один объект можно
+    разделять между потоками.
+    """
     def __init__(self, regex):
         self.regex = regex
         parser = RegexParser(regex)
-        self.nfa = parser.parse()
-        self.executor = NFAExecutor(self.nfa)
+        self._build(Program.compile(parser.parse()), parser.literals)
+
+    def __getstate__(self):
+        # Передаётся только компактная программа; таблицы строятся заново
+        return self.regex, self.program, self.literals
+
+    def __setstate__(self, state):
+        self.regex = state[0]
+        self._build(state[1], state[2])
+
+    def _build(self, program, literals):
+        self.program = program
+        self.executor = NFAExecutor(program)
+        # Литералы для предварительной фильтрации текста
+        self.literals = literals
+        # Таблицы обратного прохода, строятся при первом поиске (см. _reverse_plan)
+        self._plan = None
+
+    def scan(self, text, start=0, limit=None, alive=None):
+        """
+        Пары (начало, конец) кратчайшего непустого совпадения для каждой
+        позиции начала из [start, limit) в порядке возрастания начала.
+        Если передан список alive, в него добавляется самое левое начало
+        потока, дочитавшего текст до конца и ещё не погибшего: для начал
+        не левее него совпадение могло бы закончиться за концом текста.
+
+        Поиск выполняется в два прохода, оба за O(n·m), где m - длина
+        программы. Прямой проход (_match_regions) находит участки текста,
+        содержащие совпадения; обратный (_shortest_ends) вычисляет на каждом
+        участке кратчайший конец совпадения для каждой позиции начала.
+        """
+        limit = len(text) if limit is None else min(limit, len(text))
+        for lo, hi in self._match_regions(text, start, limit, alive):
+            yield from self._shortest_ends(text, lo, hi, start, limit)
+
+    def _match_regions(self, text, start, limit, alive=None):
+        """
+        Прямой проход в стиле Pike VM по инструкциям программы: на каждой
+        позиции не более одного потока на инструкцию, поток хранит
+        абсолютную позицию своего начала, при слиянии потоков остаётся
+        самое левое начало. Выдаёт отрезки [lo, hi] от самого левого начала
+        до самого правого конца совпадений в пределах каждого участка
+        непрерывной жизни потоков.
+
+        Новые потоки запускаются только на позициях до limit и только в
+        окнах-кандидатах, найденных по обязательным литералам; уже
+        запущенные потоки продолжают работу, пока не погибнут или не
+        кончится текст. Участки без потоков пропускаются целиком.
+        """
+        program = self.program
+        ops, chars, x, y = program.ops, program.chars, program.x, program.y
+        CHAR, SPLIT, JMP = Program.CHAR, Program.SPLIT, Program.JMP
+        # При запросе живых потоков текст может оказаться лишь началом
+        # входа, и литерал совпадения может лежать за его концом, поэтому
+        # окна-кандидаты не используются
+        windows = self._candidate_windows(text, start, limit) if alive is None else None
+        window = 0
+        # claimed[i] - позиция, на которой инструкция i уже занята потоком
+        claimed = [-1] * len(ops)
+        # Потоки (инструкция CHAR или MATCH, начало) в порядке возрастания начала;
+        # каждый поток добавляется вместе с ε-замыканием по JMP и SPLIT
+        threads = []
+        pending = []
+        lo = hi = None
+        position = start
+        while True:
+            inject = position < limit
+            if inject and windows is not None:
+                while window < len(windows) and windows[window][1] < position:
+                    window += 1
+                if window == len(windows):
+                    inject = False
+                elif windows[window][0] > position:
+                    if not threads:
+                        position = windows[window][0]
+                    inject = not threads and position < limit
+            if inject:
+                # Новый поток добавляется последним: его начало самое правое
+                pending.append(program.start)
+                while pending:
+                    pc = pending.pop()
+                    if claimed[pc] != position:
+                        claimed[pc] = position
+                        op = ops[pc]
+                        if op == JMP:
+                            pending.append(x[pc])
+                        elif op == SPLIT:
+                            pending.append(y[pc])
+                            pending.append(x[pc])
+                        else:
+                            threads.append((pc, position))
+
+            if not threads:
+                if hi is not None:
+                    yield lo, hi
+                    lo = hi = None
+                if position >= limit or (windows is not None and window == len(windows)):
+                    return
+                position += 1
+                continue
+
+            for pc, origin in threads:
+                if ops[pc] == Program.MATCH and origin < position:
+                    if lo is None or origin < lo:
+                        lo = origin
+                    hi = position
+
+            if position == len(text):
+                if alive is not None:
+                    origins = [origin for pc, origin in threads if ops[pc] == CHAR]
+                    if origins:
+                        alive.append(origins[0])
+                break
+            symbol = text[position]
+            position += 1
+            next_threads = []
+            for pc, origin in threads:
+                if chars[pc] != symbol or ops[pc] != CHAR:
+                    continue
+                pending.append(x[pc])
+                while pending:
+                    pc = pending.pop()
+                    if claimed[pc] != position:
+                        claimed[pc] = position
+                        op = ops[pc]
+                        if op == JMP:
+                            pending.append(x[pc])
+                        elif op == SPLIT:
+                            pending.append(y[pc])
+                            pending.append(x[pc])
+                        else:
+                            next_threads.append((pc, origin))
+            threads = next_threads
+
+        if hi is not None:
+            yield lo, hi
+
+    def _shortest_ends(self, text, lo, hi, start, limit):
+        """
+        Обратный проход по отрезку [lo, hi]: обращённый НКА, в который
+        допускающие инструкции добавляются на каждой позиции. На позиции p
+        ends[i] - наименьший конец (не дальше hi) вычисления, начатого с
+        инструкции i на позиции p; значения выражаются через значения на
+        позиции p + 1, поэтому каждая позиция обрабатывается за O(m).
+        Возвращает пары (начало, кратчайший конец) для начал из [start, limit).
+        """
+        char_leaves, match_leaves, epsilon_order, start_leaves = self._reverse_plan()
+        chars, targets = self.program.chars, self.program.x
+        never = hi + 1
+        ends = [never] * len(self.program.ops)
+        following = [never] * len(self.program.ops)
+        spans = []
+        for position in range(hi, lo - 1, -1):
+            for pc in match_leaves:
+                ends[pc] = position
+            symbol = text[position] if position < hi else None
+            for pc in char_leaves:
+                ends[pc] = following[targets[pc]] if chars[pc] == symbol else never
+            for members, exits in epsilon_order:
+                end = never
+                for pc in exits:
+                    if ends[pc] < end:
+                        end = ends[pc]
+                for pc in members:
+                    ends[pc] = end
+
+            if start <= position < limit:
+                # Совпадение непустое: первая инструкция обязана прочитать символ
+                end = never
+                for pc in start_leaves:
+                    if ends[pc] < end:
+                        end = ends[pc]
+                if end != never:
+                    spans.append((position, end))
+            ends, following = following, ends
+        spans.reverse()
+        return spans
+
+    def _reverse_plan(self):
+        """
+        Таблицы обратного прохода, строятся при первом использовании:
+        инструкции CHAR и MATCH, компоненты сильной связности графа
+        ε-переходов (JMP, SPLIT) в порядке, при котором все преемники
+        компоненты вычисляются раньше неё, и инструкции CHAR из
+        ε-замыкания начальной инструкции.
+        """
+        plan = self._plan
+        if plan is not None:
+            return plan
+
+        program = self.program
+        ops, x, y = program.ops, program.x, program.y
+        size = len(ops)
+
+        def successors(pc):
+            if ops[pc] == Program.JMP:
+                return (x[pc],)
+            return x[pc], y[pc]
+
+        def is_epsilon(pc):
+            return ops[pc] == Program.JMP or ops[pc] == Program.SPLIT
+
+        # Алгоритм Тарьяна выдаёт компоненты, начиная со стоков
+        index = [-1] * size
+        low = [0] * size
+        on_stack = bytearray(size)
+        stack = []
+        epsilon_order = []
+        counter = 0
+        for root in range(size):
+            if index[root] >= 0 or not is_epsilon(root):
+                continue
+            work = [(root, 0)]
+            while work:
+                pc, i = work.pop()
+                if i == 0:
+                    index[pc] = low[pc] = counter
+                    counter += 1
+                    stack.append(pc)
+                    on_stack[pc] = 1
+                following = successors(pc)
+                descended = False
+                while i < len(following):
+                    target = following[i]
+                    i += 1
+                    if not is_epsilon(target):
+                        continue
+                    if index[target] < 0:
+                        work.append((pc, i))
+                        work.append((target, 0))
+                        descended = True
+                        break
+                    if on_stack[target]:
+                        low[pc] = min(low[pc], index[target])
+                if descended:
+                    continue
+                if low[pc] == index[pc]:
+                    members = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        members.append(member)
+                        if member == pc:
+                            break
+                    exits = {target for member in members for target in successors(member)}
+                    epsilon_order.append((tuple(members), tuple(exits.difference(members))))
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[pc])
+
+        char_leaves = [pc for pc in range(size) if ops[pc] == Program.CHAR]
+        match_leaves = [pc for pc in range(size) if ops[pc] == Program.MATCH]
+
+        start_leaves = []
+        seen = {program.start}
+        pending = [program.start]
+        while pending:
+            pc = pending.pop()
+            if ops[pc] == Program.CHAR:
+                start_leaves.append(pc)
+            elif is_epsilon(pc):
+                for target in successors(pc):
+                    if target not in seen:
+                        seen.add(target)
+                        pending.append(target)
+
+        plan = self._plan = (char_leaves, match_leaves, epsilon_order, start_leaves)
+        return plan
+
+    def _candidate_windows(self, text, start, limit):
+        """
+        Отрезки [lo, hi] возможных позиций начала совпадения из [start, limit)
+        (None - все позиции). Если все совпадения начинаются с литерала,
+        кандидатами являются его вхождения; иначе совпадение должно
+        содержать обязательный литерал и начинаться не далее max_length
+        символов до конца его вхождения.
+        """
+        literals = self.literals
+        if literals.prefix:
+            literal, anchored = literals.prefix, True
+        elif literals.required:
+            literal, anchored = literals.required, False
+        else:
+            return None
 
-    def find_matches(self, text):
-        matches = []
-        n = len(text)
+        windows = []
+        occurrence = text.find(literal, start)
+        while occurrence >= 0:
+            if anchored:
+                lo = occurrence
+            elif literals.max_length is None:
+                lo = 0
+            else:
+                lo = max(0, occurrence + len(literal) - literals.max_length)
+            if windows and lo <= windows[-1][1] + 1:
+                windows[-1][1] = occurrence
+            else:
+                windows.append([lo, occurrence])
+            if occurrence >= limit:
+                # Окна следующих вхождений не покрывают позиций до limit
+                break
+            occurrence = text.find(literal, occurrence + 1)
+        return windows
+
+
+class PatternCache:
+    """
+    LRU-кэш скомпилированных шаблонов с ключом - исходным текстом
+    регулярного выражения. Ведёт статистику попаданий и промахов.
+    """
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._patterns = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, regex):
+        """Скомпилированный шаблон из кэша; при промахе шаблон компилируется."""
+        with self._lock:
+            pattern = self._patterns.get(regex)
+            if pattern is not None:
+                self._patterns.move_to_end(regex)
+                self.hits += 1
+                return pattern
+            self.misses += 1
+
+        pattern = CompiledPattern(regex)
+        with self._lock:
+            # Другой поток мог успеть скомпилировать тот же шаблон
+            pattern = self._patterns.setdefault(regex, pattern)
+            self._patterns.move_to_end(regex)
+            self._evict()
+        return pattern
+
+    def resize(self, max_size):
+        """Изменение размера кэша с вытеснением лишних шаблонов."""
+        with self._lock:
+            self.max_size = max_size
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._patterns.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """Статистика кэша."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._patterns),
+                "max_size": self.max_size,
+            }
+
+    def _evict(self):
+        while len(self._patterns) > self.max_size:
+            self._patterns.popitem(last=False)
+
+
+pattern_cache = PatternCache()
+
+# Поисковик, переданный процессу-исполнителю пула (см. _init_worker)
+_worker_searcher = None
+
+
+def compile_regex(regex):
+    """Скомпилированный шаблон из общего кэша модуля."""
+    return pattern_cache.get(regex)
 
-        for i in range(n):
-            current_substring = ""
-            for j in range(i, n):
-                current_substring += text[j]
-                if self.executor.match(current_substring):
-                    matches.append(i)
-                    break
-                elif not self._can_continue(current_substring):
-                    break
-        return matches
 
-    def _can_continue(self, substring):
-        current_states = self.executor._epsilon_closure({self.nfa.start_state})
-        for symbol in substring:
-            next_states = set()
-            for state in current_states:
-                if symbol in state.transitions:
-                    next_states.update(state.transitions[symbol])
-            current_states = self.executor._epsilon_closure(next_states)
+class NFAPatternMatcher:
+    def __init__(self, regex):
+        self.regex = regex
+        self.pattern = compile_regex(regex)
+        self.program = self.pattern.program
+        self.executor = self.pattern.executor
+
+    def find_matches(self, text):
+        """Позиции, с которых начинается хотя бы одно непустое совпадение."""
+        return [start for start, _ in self.find_spans(text)]
 
-        return bool(current_states)
+    def find_spans(self, text):
+        """Пары (начало, конец) кратчайшего совпадения для каждой позиции начала."""
+        return list(self.pattern.scan(text))
 
 
 class KMP:
@@ -214,14 +782,226 @@ class KMP:
                 q = pi[q - 1]
         return matches
 
+    def search_bytes(self, data):
+        """
+        Генератор байтовых смещений вхождений шаблона в data (bytes,
+        bytearray, mmap или memoryview) без декодирования и копирования.
+        Шаблон-строка кодируется в UTF-8.
+        """
+        pattern = self.pattern.encode() if isinstance(self.pattern, str) else bytes(self.pattern)
+        if hasattr(data, 'find'):
+            # bytes, bytearray и mmap ищут подстроку сами, без копирования
+            position = data.find(pattern)
+            while position >= 0:
+                yield position
+                position = data.find(pattern, position + 1)
+            return
+
+        m = len(pattern)
+        pi = KMP(pattern).prefix_function
+        q = 0
+        with memoryview(data) as view, view.cast('B') as buffer:
+            for i, byte in enumerate(buffer):
+                while q > 0 and pattern[q] != byte:
+                    q = pi[q - 1]
+                if pattern[q] == byte:
+                    q += 1
+                if q == m:
+                    yield i - m + 1
+                    q = pi[q - 1]
+
+
+class AhoCorasick:
+    """Поиск множества шаблонов за один проход (автомат Ахо-Корасик)."""
+    def __init__(self, patterns, dense=False):
+        self.patterns = list(patterns)
+        if any(not pattern for pattern in self.patterns):
+            raise ValueError("Пустой шаблон")
+        self.lengths = [len(pattern) for pattern in self.patterns]
+
+        # Бор: goto[node] - переходы, output[node] - номера шаблонов, оканчивающихся в node
+        self.goto = [{}]
+        self.output = [()]
+        for pattern_id, pattern in enumerate(self.patterns):
+            node = 0
+            for ch in pattern:
+                next_node = self.goto[node].get(ch)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][ch] = next_node
+                    self.goto.append({})
+                    self.output.append(())
+                node = next_node
+            self.output[node] += (pattern_id,)
+
+        # Суффиксные ссылки fail и ссылки на ближайший узел с выходом по цепочке fail
+        self.fail = [0] * len(self.goto)
+        self.output_link = [0] * len(self.goto)
+        order = list(self.goto[0].values())
+        for node in order:
+            for ch, child in self.goto[node].items():
+                state = self.fail[node]
+                while state and ch not in self.goto[state]:
+                    state = self.fail[state]
+                fail = self.goto[state].get(ch, 0)
+                self.fail[child] = fail
+                self.output_link[child] = fail if self.output[fail] else self.output_link[fail]
+                order.append(child)
+
+        # Плотная таблица переходов ДКА: delta[node][ch] для всех символов шаблонов
+        self.delta = None
+        if dense:
+            self.delta = [dict(self.goto[0])]
+            self.delta.extend({} for _ in range(len(self.goto) - 1))
+            for node in order:
+                row = dict(self.delta[self.fail[node]])
+                row.update(self.goto[node])
+                self.delta[node] = row
+
+    def next_node(self, node, ch):
+        if self.delta is not None:
+            return self.delta[node].get(ch, 0)
+        while True:
+            next_node = self.goto[node].get(ch)
+            if next_node is not None:
+                return next_node
+            if not node:
+                return 0
+            node = self.fail[node]
 
-text = "ababbbabababab"
-pattern = "(ab)"
-matcher = NFAPatternMatcher(pattern)
-matches = matcher.find_matches(text)
+    def search(self, text):
+        """Все вхождения шаблонов: пары (номер шаблона, позиция начала)."""
+        return self.stream().feed(text)
+
+    def stream(self):
+        """Потоковый поиск по тексту, поступающему кусками."""
+        return AhoCorasickStream(self)
+
+
+class AhoCorasickStream:
+    """Состояние потокового поиска: узел автомата и смещение переносятся между кусками."""
+    def __init__(self, automaton):
+        self.automaton = automaton
+        self.node = 0
+        self.offset = 0
+
+    def feed(self, chunk):
+        """Вхождения, заканчивающиеся в chunk; позиции отсчитываются от начала потока."""
+        automaton = self.automaton
+        lengths = automaton.lengths
+        output = automaton.output
+        output_link = automaton.output_link
+        node = self.node
+        matches = []
+        for i, ch in enumerate(chunk, self.offset + 1):
+            node = automaton.next_node(node, ch)
+            hit = node if output[node] else output_link[node]
+            while hit:
+                for pattern_id in output[hit]:
+                    matches.append((pattern_id, i - lengths[pattern_id]))
+                hit = output_link[hit]
+        self.node = node
+        self.offset += len(chunk)
+        return matches
 
-print(f"'{pattern}' с НКА: {matches}")
 
-kmp = KMP("ab")
-kmp_matches = kmp.search(text)
-print(f"'{pattern}' с КМП: {kmp_matches}")
+def _init_worker(searcher):
+    """Инициализация процесса-исполнителя: скомпилированный поисковик передаётся один раз."""
+    global _worker_searcher
+    _worker_searcher = searcher
+
+
+def _scan_chunk(task):
+    """
+    Поиск в куске текста; учитываются только совпадения, начинающиеся до
+    limit. Возвращает позиции начала и самое левое начало, поток которого
+    дошёл до конца куска живым (None, если таких нет или длина совпадения
+    ограничена и перекрытие её покрывает).
+    """
+    offset, limit, chunk = task
+    if isinstance(_worker_searcher, KMP):
+        return [offset + start for start in _worker_searcher.search(chunk) if offset + start < limit], None
+    alive = [] if _worker_searcher.literals.max_length is None else None
+    matches = [offset + start for start, _ in _worker_searcher.scan(chunk, 0, limit - offset, alive)]
+    return matches, offset + alive[0] if alive else None
+
+
+def _scan_record(record):
+    return [start for start, _ in _worker_searcher.scan(record)]
+
+
+def _text_chunks(text, chunk_size, overlap):
+    """
+    Куски (смещение, граница, текст): кусок отвечает за позиции начала
+    [смещение, граница) и захватывает overlap символов следующего куска.
+    """
+    for offset in range(0, len(text), chunk_size):
+        limit = min(offset + chunk_size, len(text))
+        yield offset, limit, text[offset:limit + overlap]
+
+
+def parallel_find_matches(regex, text, workers=None, chunk_size=1 << 20):
+    """
+    Параллельный аналог NFAPatternMatcher.find_matches: текст делится на
+    куски с перекрытием в (наибольшая длина совпадения - 1) символов, куски
+    обрабатываются в пуле процессов, результаты сливаются по порядку.
+
+    Если длина совпадения не ограничена, перекрытие равно одному куску.
+    Когда поток, начатый в куске, доживает до конца перекрытия, его
+    совпадение может лежать дальше; тогда начиная с самого левого такого
+    начала текст досматривается одним последовательным проходом.
+    """
+    if len(text) <= chunk_size:
+        return NFAPatternMatcher(regex).find_matches(text)
+    pattern = compile_regex(regex)
+    max_length = pattern.literals.max_length
+    overlap = chunk_size if max_length is None else max_length - 1
+    return _parallel_scan(pattern, text, workers, chunk_size, overlap)
+
+
+def parallel_kmp_search(pattern, text, workers=None, chunk_size=1 << 20):
+    """Параллельный аналог KMP.search с перекрытием кусков в len(pattern) - 1 символов."""
+    kmp = KMP(pattern)
+    if len(text) <= chunk_size:
+        return kmp.search(text)
+    return _parallel_scan(kmp, text, workers, chunk_size, len(pattern) - 1)
+
+
+def _parallel_scan(searcher, text, workers, chunk_size, overlap):
+    matches = []
+    unresolved = None
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(searcher,)) as executor:
+        results = executor.map(_scan_chunk, _text_chunks(text, chunk_size, overlap))
+        for index, (chunk_matches, pending) in enumerate(results):
+            if pending is not None and (index + 1) * chunk_size + overlap < len(text):
+                # Дальнейшие куски не нужны: остаток проходится последовательно
+                executor.shutdown(cancel_futures=True)
+                matches.extend(start for start in chunk_matches if start < pending)
+                unresolved = pending
+                break
+            matches.extend(chunk_matches)
+    if unresolved is not None:
+        matches.extend(start for start, _ in searcher.scan(text, unresolved))
+    return matches
+
+
+def parallel_find_matches_many(regex, records, workers=None, chunksize=64):
+    """
+    Поиск во множестве записей (строк, содержимого файлов) в пуле процессов.
+    Выдаёт результаты find_matches для каждой записи в исходном порядке.
+    """
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(compile_regex(regex),)) as executor:
+        yield from executor.map(_scan_record, records, chunksize=chunksize)
+
+
+if __name__ == "__main__":
+    text = "ababbbabababab"
+    pattern = "(ab)"
+    matcher = NFAPatternMatcher(pattern)
+    matches = matcher.find_matches(text)
+
+    print(f"'{pattern}' с НКА: {matches}")
+
+    kmp = KMP("ab")
+    kmp_matches = kmp.search(text)
+    print(f"'{pattern}' с КМП: {kmp_matches}")
@@ -1,3 +1,6 @@
+import io
+import re
+
 import ply.lex as lex
 
 tokens = (
@@ -18,11 +21,130 @@ t_ignore = ' \t\n'
 
 def t_error(t):
     t.lexer.skip(1)
-    raise "Illegal character '{t.value[0]}'"
+    raise ValueError(f"Illegal character '{t.value[0]}'")
 
 
 lexer = lex.lex()
 
+
+class XMLTokenizer:
+    """
+    Потоковый лексический анализатор с теми же правилами, что и у ply.lex:
+    правила-строки объединяются в одно регулярное выражение в порядке
+    убывания длины выражения, символы ignore пропускаются между лексемами.
+
+    Скомпилированные правила общие; каждый вызов tokenize возвращает
+    отдельный поток TokenStream со своим буфером чтения, поэтому несколько
+    разборов одним анализатором не мешают друг другу.
+    """
+
+    def __init__(self, rules, ignore="", reflags=re.VERBOSE):
+        # rules - пары (имя, выражение) в порядке определения;
+        # номер типа лексемы - индекс правила в rules
+        self.names = [name for name, _ in rules]
+        order = sorted(range(len(rules)), key=lambda index: len(rules[index][1]), reverse=True)
+        self.master = re.compile(
+            "|".join(f"(?P<{rules[index][0]}>{rules[index][1]})" for index in order), reflags
+        )
+        # Номер внешней группы правила -> номер типа (m.lastindex - внешняя группа,
+        # так как она закрывается после вложенных)
+        self.group_types = [-1] * (self.master.groups + 1)
+        for type_id, name in enumerate(self.names):
+            self.group_types[self.master.groupindex[name]] = type_id
+        self.ignore = re.compile(f"[{re.escape(ignore)}]*") if ignore else None
+
+    def tokenize(self, source, chunk_size=1 << 16, max_token_size=1 << 26):
+        """Поток лексем строки, файла (объекта с методом read) или итератора кусков."""
+        return TokenStream(self, self._chunks(source, chunk_size), chunk_size, max_token_size)
+
+    @staticmethod
+    def _chunks(source, chunk_size):
+        if isinstance(source, str):
+            source = io.StringIO(source)
+        if hasattr(source, "read"):
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+        else:
+            for chunk in source:
+                if chunk:
+                    yield chunk
+
+
+class TokenStream:
+    """
+    Один проход XMLTokenizer по входу. Вход читается кусками в собственный
+    буфер потока, итерация выдаёт лексемы кортежами (номер типа, начало,
+    конец) со смещениями от начала входа; текст лексемы берётся методом text.
+    """
+
+    def __init__(self, tokenizer, chunks, chunk_size, max_token_size):
+        self.tokenizer = tokenizer
+        self.buffer = ""
+        self.buffer_start = 0  # смещение начала буфера во входе
+        self._tokens = self._scan(chunks, chunk_size, max_token_size)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._tokens)
+
+    def text(self, start, end):
+        """Текст лексемы; доступен, пока лексема не вытеснена из буфера следующим чтением."""
+        if start < self.buffer_start:
+            raise ValueError("Лексема уже вытеснена из буфера")
+        return self.buffer[start - self.buffer_start:end - self.buffer_start]
+
+    def _scan(self, chunks, chunk_size, max_token_size):
+        # Лексема, не поместившаяся в буфер, дочитывается: размер чтения
+        # растёт вместе с ней, поэтому длинные лексемы не копируются многократно
+        tokenizer = self.tokenizer
+        position = 0
+        eof = False
+        match = tokenizer.master.match
+        skip = tokenizer.ignore.match if tokenizer.ignore else None
+        group_types = tokenizer.group_types
+
+        while True:
+            buffer = self.buffer
+            size = len(buffer)
+            if skip:
+                position = skip(buffer, position).end()
+            m = match(buffer, position) if position < size else None
+            # Лексема у конца буфера может продолжиться в следующем куске
+            if not eof and (m is None or m.end() == size):
+                if size - position > max_token_size:
+                    raise ValueError(f"Token longer than {max_token_size} characters at offset "
+                                     f"{self.buffer_start + position}")
+                needed = max(chunk_size, size - position)
+                read = []
+                while needed > 0:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        eof = True
+                        break
+                    read.append(chunk)
+                    needed -= len(chunk)
+                self.buffer = buffer[position:] + "".join(read)
+                self.buffer_start += position
+                position = 0
+                continue
+            if m is None:
+                if position == size:
+                    return
+                raise ValueError(f"Illegal character '{buffer[position]}' at offset {self.buffer_start + position}")
+            end = m.end()
+            if end == position:
+                raise ValueError(f"Empty token at offset {self.buffer_start + position}")
+            yield group_types[m.lastindex], self.buffer_start + position, self.buffer_start + end
+            position = end
+
+
+xml_tokenizer = XMLTokenizer([(name, globals()["t_" + name]) for name in tokens], t_ignore)
+
 data = '''
 <?xml version="1.0"?>
 <root>
@@ -36,3 +158,8 @@ if __name__ == '__main__':
     lexer.input(data)
     for tok in lexer:
         print(tok)
+
+    # Тот же разбор потоковым анализатором (маленькие куски для наглядности)
+    stream = xml_tokenizer.tokenize(io.StringIO(data), chunk_size=16)
+    for type_id, start, end in stream:
+        print(tokens[type_id], repr(stream.text(start, end)), start, end)
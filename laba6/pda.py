@@ -1,3 +1,17 @@
+def push(stack, item):
+    """
+    Добавление элемента в стек (память или дерево) на месте; возвращает
+    тот же список, поэтому удобно в правилах-лямбдах вместо stack + [item],
+    который копирует весь стек на каждом шаге.
+    """
+    stack.append(item)
+    return stack
+
+
+def _dead_rule(ch, memory, tree):
+    return {"state_id": -1, "memory": [], "tree": []}
+
+
 class StateMachine:
     """
     Базовый класс конечного автомата.
@@ -16,24 +30,53 @@ class StateMachine:
         self.init_state_id = init_state_id
 
 
+class FsmContext:
+    """
+    Состояние одного прогона автомата. Сам Fsm при прогоне не изменяется,
+    поэтому один автомат можно использовать из нескольких потоков или
+    задач asyncio, если у каждого прогона свой контекст.
+    """
+    __slots__ = ('state_id', 'memory', 'tree')
+
+    def __init__(self, state_id=0):
+        self.state_id = state_id
+        self.memory = []  # Память автомата
+        self.tree = []  # Дерево переходов
+
+    def reset(self, state_id):
+        """
+        Подготовка к новому прогону. Память очищается на месте, а дерево
+        заменяется новым списком, так как оно отдаётся в результате.
+        """
+        self.state_id = state_id
+        self.memory.clear()
+        self.tree = []
+
+
 class Fsm(StateMachine):
     """
     Расширенный конечный автомат с памятью и правилами переходов.
+    Состояние прогона хранится в FsmContext, а не в самом автомате.
     """
 
     def __init__(self, alphabet=None, init_state_id=0, end_state_id=0, states=None, end_rule=None):
         super().__init__(alphabet or [], init_state_id, end_state_id, states or [])
-        self.current_state_id = init_state_id
-        self.memory = []  # Память автомата
-        self.tree = []  # Дерево переходов
         self.end_rule = end_rule or (lambda state_id, memory: {"state_id": -1, "memory": []})
+        self.index_states()
+
+    def index_states(self):
+        """
+        Построение индексов: правило по номеру состояния и множество символов
+        алфавита. Вызывается заново, если states или alphabet изменены.
+        """
+        self.rules = {state.get("state_id"): state.get("rule", _dead_rule) for state in self.states}
+        self.alphabet_set = frozenset(self.alphabet)
 
     def set_init_state_id(self, init_state_id=0):
         """
         Установить начальное состояние.
         """
         super().set_init_state_id(init_state_id)
-        self.current_state_id = init_state_id
 
     def set_end_rule(self, end_rule=None):
         """
@@ -41,50 +84,65 @@ class Fsm(StateMachine):
         """
         self.end_rule = end_rule or (lambda state_id, memory: {"state_id": -1, "memory": []})
 
-    def clear(self):
+    def new_context(self):
         """
-        Сброс состояния автомата.
+        Новый контекст прогона в начальном состоянии.
         """
-        self.current_state_id = self.init_state_id
-        self.memory = []
-        self.tree = []
+        return FsmContext(self.init_state_id)
 
     def check_string(self, string):
         """
         Проверка строки: состоит ли она только из символов алфавита.
         """
-        return all(ch in self.alphabet for ch in string)
+        alphabet = self.alphabet_set
+        return all(ch in alphabet for ch in string)
 
-    def run(self, string=''):
+    def run(self, string='', context=None):
         """
-        Запустить автомат с переданной строкой.
+        Запустить автомат с переданной строкой. Если передан context, он
+        сбрасывается и используется для прогона, иначе создаётся новый.
+
+        Правило получает (символ, память, дерево) и возвращает словарь с
+        новым "state_id". Память и дерево правило может изменять на месте
+        (см. push): если ключей "memory" и "tree" в ответе нет, остаются
+        прежние списки.
         """
-        self.current_state_id = self.init_state_id
+        if context is None:
+            context = self.new_context()
+        else:
+            context.reset(self.init_state_id)
         if self.check_string(string):
+            rules = self.rules
+            state_id = context.state_id
+            memory = context.memory
+            tree = context.tree
             for ch in string:
-                # Найти текущее состояние
-                state = next((s for s in self.states if s.get("state_id") == self.current_state_id), {})
-                rule = state.get("rule", lambda ch, memory, tree: {"state_id": -1, "memory": [], "tree": []})
-
-                # Применить правило перехода
-                transition = rule(ch, self.memory, self.tree)
-                self.current_state_id = transition.get("state_id", -1)
-                self.memory = transition.get("memory", [])
-                self.tree = transition.get("tree", [])
+                # Применить правило перехода текущего состояния
+                transition = rules.get(state_id, _dead_rule)(ch, memory, tree)
+                state_id = transition.get("state_id", -1)
+                memory = transition.get("memory", memory)
+                tree = transition.get("tree", tree)
 
             # Применить заключительное правило
-            end_result = self.end_rule(self.current_state_id, self.memory)
-            self.current_state_id = end_result.get("state_id", -1)
-            self.memory = end_result.get("memory", [])
+            end_result = self.end_rule(state_id, memory)
+            context.state_id = end_result.get("state_id", -1)
+            context.memory = end_result.get("memory", memory)
+            context.tree = tree
 
             # Определить результат
-            result = self.current_state_id == self.end_state_id
-            tree = self.tree
-            self.clear()
-            return {"result": result, "tree": tree}
+            return {"result": context.state_id == self.end_state_id, "tree": tree}
         else:
             return {"result": "invalid string"}
 
+    def run_many(self, strings, context=None):
+        """
+        Прогон автомата на нескольких строках с одним переиспользуемым
+        контекстом. Возвращает список результатов в порядке строк.
+        """
+        if context is None:
+            context = self.new_context()
+        return [self.run(string, context) for string in strings]
+
 
 # Пример использования
 if __name__ == "__main__":
@@ -94,16 +152,16 @@ if __name__ == "__main__":
             "state_id": 0,
             "rule": lambda ch, memory, tree: {
                 "state_id": 1 if ch == 'a' else -1,
-                "memory": memory + [ch],
-                "tree": tree + [(0, 1, ch)]
+                "memory": push(memory, ch),
+                "tree": push(tree, (0, 1, ch))
             },
         },
         {
             "state_id": 1,
             "rule": lambda ch, memory, tree: {
                 "state_id": 2 if ch == 'b' else -1,
-                "memory": memory + [ch],
-                "tree": tree + [(1, 2, ch)]
+                "memory": push(memory, ch),
+                "tree": push(tree, (1, 2, ch))
             },
         },
     ]
@@ -119,6 +177,5 @@ if __name__ == "__main__":
 
     # Тестовые строки
     test_strings = ["ab", "abab", "a", "b"]
-    for string in test_strings:
-        result = fsm.run(string)
+    for string, result in zip(test_strings, fsm.run_many(test_strings)):
         print(f"Строка '{string}': {'допустима' if result['result'] else 'недопустима'}, дерево: {result['tree']}")
@@ -1,41 +1,918 @@
 import csv
+from array import array
+
 from anytree import Node, RenderTree
 
-class ParseTreeGenerator:
+
+class ParseTree:
+    """
+    Компактное дерево разбора: узлы в прямом порядке обхода хранятся в
+    параллельных массивах (индекс родителя, номер символа, отрезок входа).
+    Узлы anytree создаются только по требованию.
+    """
+    __slots__ = ('names', 'symbol_ids', 'parent', 'symbol', 'start', 'end')
+
+    def __init__(self):
+        self.names = []
+        self.symbol_ids = {}
+        self.parent = array('i')
+        self.symbol = array('i')
+        self.start = array('i')
+        self.end = array('i')
+
+    def __len__(self):
+        return len(self.parent)
+
+    def add(self, parent, name, start, end):
+        """Добавление узла; возвращает его индекс."""
+        symbol = self.symbol_ids.get(name)
+        if symbol is None:
+            symbol = self.symbol_ids[name] = len(self.names)
+            self.names.append(name)
+        self.parent.append(parent)
+        self.symbol.append(symbol)
+        self.start.append(start)
+        self.end.append(end)
+        return len(self.parent) - 1
+
+    def name(self, index):
+        return self.names[self.symbol[index]]
+
+    def to_anytree(self):
+        """
+        Перевод в узлы anytree. Узлы создаются снизу вверх, так что при
+        присоединении потомков anytree не обходит длинные цепочки предков.
+        """
+        children = [[] for _ in range(len(self))]
+        nodes = [None] * len(self)
+        for index in range(len(self) - 1, -1, -1):
+            kids = children[index]
+            kids.reverse()
+            nodes[index] = Node(self.name(index), children=kids)
+            if self.parent[index] >= 0:
+                children[self.parent[index]].append(nodes[index])
+        return nodes[0] if nodes else None
+
+
+def _fresh_symbol(name, used):
+    """Новое имя нетерминала, не совпадающее ни с одним из used."""
+    candidate = name
+    index = 0
+    while candidate in used:
+        index += 1
+        candidate = f"{name}_{index}"
+    used.add(candidate)
+    return candidate
+
+
+def _grammar_symbols(grammar):
+    symbols = set(grammar)
+    for productions in grammar.values():
+        for production in productions:
+            symbols.update(production)
+    return symbols
+
+
+def _add_production(grammar, lhs, production, seen):
+    key = (lhs, tuple(production))
+    if key not in seen:
+        seen.add(key)
+        grammar.setdefault(lhs, []).append(list(production))
+
+
+def remove_useless(grammar, start_symbol):
+    """
+    Удаление бесполезных символов: сначала непорождающих (не выводящих
+    ни одной терминальной строки), затем недостижимых из начального.
+    """
+    generating = set()
+    changed = True
+    while changed:
+        changed = False
+        for lhs, productions in grammar.items():
+            if lhs in generating:
+                continue
+            for production in productions:
+                if all(symbol in generating or symbol not in grammar for symbol in production):
+                    generating.add(lhs)
+                    changed = True
+                    break
+
+    productive = {
+        lhs: [p for p in productions if all(s in generating or s not in grammar for s in p)]
+        for lhs, productions in grammar.items()
+        if lhs in generating
+    }
+
+    reachable = {start_symbol}
+    stack = [start_symbol]
+    while stack:
+        for production in productive.get(stack.pop(), []):
+            for symbol in production:
+                if symbol in productive and symbol not in reachable:
+                    reachable.add(symbol)
+                    stack.append(symbol)
+
+    result = {lhs: productions for lhs, productions in productive.items() if lhs in reachable}
+    result.setdefault(start_symbol, [])
+    return result
+
+
+def remove_epsilon(grammar, start_symbol):
+    """
+    Удаление ε-правил: каждое правило заменяется всеми вариантами с
+    выброшенными обнуляемыми символами. Правило S -> ε сохраняется, если
+    пустая строка принадлежит языку.
+    """
+    nullable = set()
+    changed = True
+    while changed:
+        changed = False
+        for lhs, productions in grammar.items():
+            if lhs not in nullable and any(all(s in nullable for s in p) for p in productions):
+                nullable.add(lhs)
+                changed = True
+
+    result = {lhs: [] for lhs in grammar}
+    seen = set()
+    for lhs, productions in grammar.items():
+        for production in productions:
+            variants = [()]
+            for symbol in production:
+                variants = [v + (symbol,) for v in variants] + (variants if symbol in nullable else [])
+            for variant in variants:
+                if variant:
+                    _add_production(result, lhs, variant, seen)
+    if start_symbol in nullable:
+        _add_production(result, start_symbol, (), seen)
+    return result
+
+
+def remove_unit(grammar):
+    """Удаление цепных правил A -> B через замыкание цепных пар."""
+    result = {}
+    seen = set()
+    for lhs in grammar:
+        # Все B, для которых A =>* B только цепными правилами
+        units = [lhs]
+        reached = {lhs}
+        for symbol in units:
+            for production in grammar.get(symbol, []):
+                if len(production) == 1 and production[0] in grammar and production[0] not in reached:
+                    reached.add(production[0])
+                    units.append(production[0])
+        result[lhs] = []
+        for symbol in units:
+            for production in grammar[symbol]:
+                if not (len(production) == 1 and production[0] in grammar):
+                    _add_production(result, lhs, production, seen)
+    return result
+
+
+def to_cnf(grammar, start_symbol):
+    """
+    Приведение к нормальной форме Хомского: новый начальный символ (если
+    исходный встречается в правых частях), вынос терминалов из длинных
+    правил, разбиение правил на пары, удаление ε-правил, цепных правил и
+    бесполезных символов. Возвращает пару (грамматика, начальный символ).
+    """
+    used = _grammar_symbols(grammar) | {start_symbol}
+    result = {lhs: [list(p) for p in productions] for lhs, productions in grammar.items()}
+    result.setdefault(start_symbol, [])
+
+    if any(start_symbol in p for productions in result.values() for p in productions):
+        new_start = _fresh_symbol(start_symbol + "0", used)
+        result[new_start] = [[start_symbol]]
+        start_symbol = new_start
+
+    # Терминалы в правилах длины >= 2 заменяются нетерминалами T -> a
+    term_symbols = {}
+    for lhs in list(result):
+        for production in result[lhs]:
+            if len(production) < 2:
+                continue
+            for index, symbol in enumerate(production):
+                if symbol in result:
+                    continue
+                if symbol not in term_symbols:
+                    term_symbols[symbol] = _fresh_symbol("T_" + str(symbol), used)
+                production[index] = term_symbols[symbol]
+    for terminal, symbol in term_symbols.items():
+        result[symbol] = [[terminal]]
+
+    # A -> X1 X2 ... Xn  =>  A -> X1 A_1, A_1 -> X2 A_2, ...
+    binary = {}
+    for lhs, productions in result.items():
+        for production in productions:
+            head = lhs
+            while len(production) > 2:
+                tail = _fresh_symbol(lhs, used)
+                binary.setdefault(head, []).append([production[0], tail])
+                head, production = tail, production[1:]
+            binary.setdefault(head, []).append(production)
+
+    result = remove_unit(remove_epsilon(binary, start_symbol))
+    return remove_useless(result, start_symbol), start_symbol
+
+
+class CompiledGrammar:
+    """
+    Грамматика, скомпилированная один раз для многих разборов. Символы
+    заменены номерами: нетерминалы 0..nonterminal_count-1, затем терминалы.
+    Заранее вычислены обнуляемые нетерминалы, множества FIRST и FOLLOW и,
+    если грамматика LL(1), таблица предсказывающего разбора.
+    """
+
+    END = -1  # конец входа в FOLLOW и в таблице LL(1)
+
     def __init__(self, grammar, start_symbol):
         self.grammar = grammar
         self.start_symbol = start_symbol
-        self.tree_root = None
+
+        nonterminals = list(grammar)
+        if start_symbol not in grammar:
+            nonterminals.append(start_symbol)
+        terminals = []
+        known = set(nonterminals)
+        for productions in grammar.values():
+            for production in productions:
+                for symbol in production:
+                    if symbol not in known:
+                        known.add(symbol)
+                        terminals.append(symbol)
+
+        self.symbols = nonterminals + terminals
+        self.symbol_ids = {symbol: index for index, symbol in enumerate(self.symbols)}
+        self.nonterminal_count = len(nonterminals)
+        self.terminal_ids = {symbol: self.symbol_ids[symbol] for symbol in terminals}
+        self.start = self.symbol_ids[start_symbol]
+        self.single_char_terminals = all(isinstance(t, str) and len(t) == 1 for t in terminals)
+
+        # Правила: (левая часть, правая часть) в номерах символов
+        self.rules = []
+        self.rules_by_symbol = [[] for _ in range(self.nonterminal_count)]
+        for non_terminal, productions in grammar.items():
+            lhs = self.symbol_ids[non_terminal]
+            for production in productions:
+                self.rules_by_symbol[lhs].append(len(self.rules))
+                self.rules.append((lhs, tuple(self.symbol_ids[symbol] for symbol in production)))
+
+        self.nullable = self._compute_nullable()
+        self.first = self._compute_first()
+        self.follow = self._compute_follow()
+        self.is_cnf = self._is_cnf()
+        self.ll1_table, self.ll1_conflicts = self._build_ll1_table()
+
+    def _compute_nullable(self):
+        """nullable[символ] = 1, если из него выводится пустая строка."""
+        nullable = bytearray(len(self.symbols))
+        changed = True
+        while changed:
+            changed = False
+            for lhs, rhs in self.rules:
+                if not nullable[lhs] and all(nullable[symbol] for symbol in rhs):
+                    nullable[lhs] = 1
+                    changed = True
+        return nullable
+
+    def _compute_first(self):
+        first = [set() for _ in range(self.nonterminal_count)]
+        changed = True
+        while changed:
+            changed = False
+            for lhs, rhs in self.rules:
+                before = len(first[lhs])
+                first[lhs] |= self.first_of(rhs, first)
+                changed |= len(first[lhs]) != before
+        return first
+
+    def first_of(self, symbols, first=None):
+        """FIRST последовательности символов (без учёта её обнуляемости)."""
+        first = self.first if first is None else first
+        result = set()
+        for symbol in symbols:
+            if symbol >= self.nonterminal_count:
+                result.add(symbol)
+                break
+            result |= first[symbol]
+            if not self.nullable[symbol]:
+                break
+        return result
+
+    def _compute_follow(self):
+        follow = [set() for _ in range(self.nonterminal_count)]
+        follow[self.start].add(self.END)
+        changed = True
+        while changed:
+            changed = False
+            for lhs, rhs in self.rules:
+                for index, symbol in enumerate(rhs):
+                    if symbol >= self.nonterminal_count:
+                        continue
+                    rest = rhs[index + 1:]
+                    before = len(follow[symbol])
+                    follow[symbol] |= self.first_of(rest)
+                    if all(self.nullable[s] for s in rest):
+                        follow[symbol] |= follow[lhs]
+                    changed |= len(follow[symbol]) != before
+        return follow
+
+    def _is_cnf(self):
+        """Грамматика в нормальной форме Хомского: A -> B C, A -> a, S -> ε."""
+        count = self.nonterminal_count
+        for lhs, rhs in self.rules:
+            if len(rhs) == 2:
+                if not all(symbol < count and symbol != self.start for symbol in rhs):
+                    return False
+            elif len(rhs) == 1:
+                if rhs[0] < count:
+                    return False
+            elif rhs or lhs != self.start:
+                return False
+        return True
+
+    def _build_ll1_table(self):
+        """
+        Таблица LL(1): table[нетерминал][терминал или END] -> номер правила.
+        Если грамматика не LL(1), таблица равна None, а конфликтующие
+        пары (нетерминал, терминал) перечислены во втором значении.
+        """
+        table = [{} for _ in range(self.nonterminal_count)]
+        conflicts = set()
+        for rule, (lhs, rhs) in enumerate(self.rules):
+            lookaheads = self.first_of(rhs)
+            if all(self.nullable[symbol] for symbol in rhs):
+                lookaheads |= self.follow[lhs]
+            for terminal in lookaheads:
+                if table[lhs].setdefault(terminal, rule) != rule:
+                    conflicts.add((lhs, terminal))
+        return (None if conflicts else table), conflicts
+
+    def to_cnf(self):
+        """Эквивалентная грамматика в нормальной форме Хомского (ε-правило S -> ε допускается)."""
+        return CompiledGrammar(*to_cnf(self.grammar, self.start_symbol))
+
+    def to_pda(self):
+        """МП-автомат, допускающий язык грамматики пустым стеком."""
+        return PDA.from_cnf(self)
+
+
+class PDA:
+    """
+    Недетерминированный МП-автомат.
+
+    transitions[(состояние, входной символ или None, верхний символ стека)]
+    -> список пар (новое состояние, цепочка символов, заменяющая верхний
+    символ; первый символ цепочки становится верхним). Если final_states
+    не заданы, автомат допускает пустым стеком.
+
+    min_yield[символ стека] - нижняя оценка числа входных символов,
+    прочитанных до снятия этого символа со стека. При допуске пустым стеком
+    ветви, которым не хватает оставшегося входа, отбрасываются.
+    """
+
+    # События моделирования
+    _START, _POP, _RETURN = range(3)
+
+    def __init__(self, states, transitions, start_state, start_stack, final_states=None, min_yield=None):
+        self.states = states
+        self.transitions = transitions
+        self.start_state = start_state
+        self.start_stack = start_stack
+        self.final_states = final_states
+        self.min_yield = min_yield or {}
+
+        self.epsilon = {}
+        self.reading = {}
+        for (state, symbol, top), moves in transitions.items():
+            if symbol is None:
+                self.epsilon.setdefault((state, top), []).extend(moves)
+            else:
+                self.reading.setdefault((state, symbol, top), []).extend(moves)
+
+    @staticmethod
+    def from_cnf(grammar, start_symbol=None):
+        """
+        МП-автомат с одним состоянием, допускающий пустым стеком язык
+        грамматики (грамматика не в НФХ предварительно приводится к ней):
+        A -> a  - прочитать a и снять A;
+        A -> B C - заменить A на B C без чтения входа;
+        S -> ε  - снять S без чтения входа.
+        """
+        if not isinstance(grammar, CompiledGrammar):
+            grammar = CompiledGrammar(grammar, start_symbol)
+        if not grammar.is_cnf:
+            grammar = grammar.to_cnf()
+
+        state = "q"
+        transitions = {}
+        for lhs, productions in grammar.grammar.items():
+            for production in productions:
+                if len(production) == 1:
+                    key = (state, production[0], lhs)
+                    transitions.setdefault(key, []).append((state, ()))
+                else:
+                    key = (state, None, lhs)
+                    transitions.setdefault(key, []).append((state, tuple(production)))
+
+        # Длина кратчайшей выводимой строки для каждого нетерминала
+        min_yield = {}
+        changed = True
+        while changed:
+            changed = False
+            for lhs, productions in grammar.grammar.items():
+                for production in productions:
+                    if len(production) == 1:
+                        length = 1
+                    elif all(symbol in min_yield for symbol in production):
+                        length = sum(min_yield[symbol] for symbol in production)
+                    else:
+                        continue
+                    if length < min_yield.get(lhs, length + 1):
+                        min_yield[lhs] = length
+                        changed = True
+
+        return PDA({state}, transitions, state, grammar.start_symbol, min_yield=min_yield)
+
+    def accepts(self, symbols):
+        """
+        Моделирование поиском в ширину по позициям входа со стеком в виде
+        общего графа (GSS). Конфигурация с верхним символом X в состоянии p
+        на позиции i - узел графа (p, X, i); то, что лежит под X, хранится
+        как множество продолжений узла и не копируется при ветвлении.
+        Одинаковые узлы сливаются, а уже найденные способы снять X
+        (состояние, позиция) запоминаются и применяются к продолжениям,
+        добавленным позже. Поэтому число конфигураций полиномиально по длине
+        входа даже при левой рекурсии и неоднозначности.
+        """
+        symbols = list(symbols)
+        n = len(symbols)
+        prune = self.final_states is None
+        final_states = self.final_states or ()
+
+        # Продолжение - пара (родительский узел, ещё не обработанный
+        # остаток цепочки); родитель None означает дно стека.
+        waiting = {}
+        popped = {}
+        agenda = [[] for _ in range(n + 1)]
+        agenda[0].append((self._START, (self.start_state, self.start_stack, 0), (None, ())))
+
+        for position in range(n + 1):
+            remaining = n - position
+            events = agenda[position]
+            while events:
+                kind, target, value = events.pop()
+
+                if kind == self._START:
+                    node, cont = target, value
+                    conts = waiting.get(node)
+                    if conts is not None:
+                        if cont not in conts:
+                            conts[cont] = None
+                            for state, end in list(popped[node]):
+                                events.append((self._RETURN, cont, state))
+                        continue
+                    waiting[node] = {cont: None}
+                    popped[node] = set()
+                    state, top, _ = node
+                    if state in final_states and position == n:
+                        return True
+                    if prune and self.min_yield.get(top, 0) > remaining:
+                        continue
+                    for next_state, sequence in self.epsilon.get((state, top), ()):
+                        events.append(self._move(node, next_state, sequence, position))
+                    if position < n:
+                        for next_state, sequence in self.reading.get((state, symbols[position], top), ()):
+                            agenda[position + 1].append(self._move(node, next_state, sequence, position + 1))
+
+                elif kind == self._POP:
+                    node, state = target, value
+                    if (state, position) in popped[node]:
+                        continue
+                    popped[node].add((state, position))
+                    for cont in list(waiting[node]):
+                        events.append((self._RETURN, cont, state))
+
+                else:
+                    (parent, rest), state = target, value
+                    if rest:
+                        events.append((self._START, (state, rest[0], position), (parent, rest[1:])))
+                    elif parent is not None:
+                        events.append((self._POP, parent, state))
+                    elif position == n and (prune or state in final_states):
+                        # Стек пуст
+                        return True
+
+            if position < n and not agenda[position + 1]:
+                return False
+        return False
+
+    def _move(self, node, state, sequence, position):
+        """Событие перехода из узла node: замена верхнего символа цепочкой sequence."""
+        if sequence:
+            return self._START, (state, sequence[0], position), (node, sequence[1:])
+        return self._POP, node, state
+
+
+class ParseTreeGenerator:
+    def __init__(self, grammar, start_symbol=None):
+        # Грамматику можно скомпилировать один раз и передавать готовой
+        if isinstance(grammar, CompiledGrammar):
+            self.compiled = grammar
+        else:
+            self.compiled = CompiledGrammar(grammar, start_symbol)
+        self.grammar = self.compiled.grammar
+        self.start_symbol = self.compiled.start_symbol
+        self.tree = None
+        self._tree_root = None
+
+        # Символы и правила в номерах (см. CompiledGrammar)
+        self.symbols = self.compiled.symbols
+        self.rules = self.compiled.rules
+        self.rules_by_symbol = self.compiled.rules_by_symbol
+        self.nullable = self.compiled.nullable
+        if self.compiled.ll1_table is not None:
+            self.strategy = "ll1"
+        elif self.compiled.is_cnf:
+            self.strategy = "cyk"
+        else:
+            self.strategy = "earley"
+
+        self.input = None
+        self.spans = {}
+        self.starts = {}
+        self.forest = {}
+
+    def _strategy_for(self, input_string):
+        """
+        LL(1) и CYK читают вход по одному терминалу, поэтому для строки с
+        многосимвольными терминалами используется алгоритм Эрли.
+        """
+        if isinstance(input_string, str) and not self.compiled.single_char_terminals:
+            return "earley"
+        return self.strategy
 
     def parse(self, input_string):
-        self.tree_root = Node(self.start_symbol)
-        success, remaining = self._parse_recursive(self.start_symbol, input_string, self.tree_root)
-        return success and not remaining
-
-    def _parse_recursive(self, non_terminal, input_string, parent_node):
-        if non_terminal not in self.grammar:
-            if input_string.startswith(non_terminal):
-                Node(non_terminal, parent=parent_node)
-                return True, input_string[len(non_terminal):]
-            return False, input_string
-
-        for production in self.grammar[non_terminal]:
-            current_node = Node(non_terminal, parent=parent_node)
-            remaining_string = input_string
-            success = True
+        """
+        Разбор строки (или последовательности токенов). Для LL(1)-грамматик
+        дерево строится предсказывающим разбором за линейное время, иначе
+        табличным методом: CYK для грамматик в НФХ, алгоритм Эрли для
+        остальных. Результатом табличного разбора является упакованный лес
+        (все деревья разбора), из которого строится первое дерево.
+        """
+        self.input = input_string
+        self.forest = {}
+        self.tree = None
+        self._tree_root = None
+        n = len(input_string)
+        root = self.compiled.start
+        strategy = self._strategy_for(input_string)
 
-            for symbol in production:
-                result, remaining_string = self._parse_recursive(symbol, remaining_string, current_node)
-                if not result:
-                    success = False
-                    break
+        if strategy == "ll1":
+            self.tree = self._ll1()
+            # Грамматика однозначна, поэтому лес состоит из отрезков этого дерева
+            self.spans = {}
+            if self.tree is not None:
+                tree = self.tree
+                for index in range(1, len(tree)):
+                    symbol = self.compiled.symbol_ids[tree.name(index)]
+                    if symbol < self.compiled.nonterminal_count:
+                        self.spans.setdefault((symbol, tree.start[index]), set()).add(tree.end[index])
+        elif strategy == "cyk":
+            self.spans = self._cyk()
+        else:
+            self.spans = self._earley()
+        # Обратный индекс: (нетерминал, конец) -> начала выведенных отрезков
+        self.starts = {}
+        for (symbol, start), ends in self.spans.items():
+            for end in ends:
+                self.starts.setdefault((symbol, end), set()).add(start)
+
+        if n not in self.spans.get((root, 0), ()):
+            return False
+
+        if self.tree is None:
+            self.tree = self._build_first_tree((root, 0, n))
+        return True
+
+    def _ll1(self):
+        """
+        Предсказывающий разбор по таблице LL(1) с явным стеком. Узлы
+        дерева добавляются в прямом порядке; конец отрезка нетерминала
+        записывается, когда со стека снимается его маркер закрытия.
+        Возвращает ParseTree или None при ошибке.
+        """
+        compiled = self.compiled
+        table = compiled.ll1_table
+        terminal_ids = compiled.terminal_ids
+        count = compiled.nonterminal_count
+        try:
+            tokens = [terminal_ids[token] for token in self.input]
+        except (KeyError, TypeError):
+            return None
+        n = len(tokens)
+
+        tree = ParseTree()
+        stack = [(compiled.start, tree.add(-1, self.start_symbol, 0, n))]
+        position = 0
+        while stack:
+            symbol, parent = stack.pop()
+            if symbol is None:
+                tree.end[parent] = position
+                continue
+            lookahead = tokens[position] if position < n else compiled.END
+            if symbol >= count:
+                if symbol != lookahead:
+                    return None
+                tree.add(parent, self.symbols[symbol], position, position + 1)
+                position += 1
+                continue
+            rule = table[symbol].get(lookahead)
+            if rule is None:
+                return None
+            node = tree.add(parent, self.symbols[symbol], position, position)
+            stack.append((None, node))
+            for child in reversed(self.rules[rule][1]):
+                stack.append((child, node))
+        return tree if position == n else None
+
+    @property
+    def tree_root(self):
+        """Корень дерева разбора в виде узла anytree (строится при первом обращении)."""
+        if self._tree_root is None and self.tree is not None:
+            self._tree_root = self.tree.to_anytree()
+        return self._tree_root
+
+    def _match_terminal(self, terminal, position):
+        """Конец вхождения терминала (по номеру) в позиции position или -1."""
+        terminal = self.symbols[terminal]
+        if isinstance(self.input, str):
+            if self.input.startswith(terminal, position):
+                return position + len(terminal)
+        elif position < len(self.input) and self.input[position] == terminal:
+            return position + 1
+        return -1
+
+    def _terminal_start(self, terminal, end):
+        """Начало вхождения терминала, оканчивающегося в позиции end, или -1."""
+        start = end - len(self.symbols[terminal]) if isinstance(self.input, str) else end - 1
+        if start >= 0 and self._match_terminal(terminal, start) == end:
+            return start
+        return -1
+
+    def _earley(self):
+        """
+        Распознаватель Эрли (с обработкой ε-правил по Эйкоку-Хорспулу).
+        Возвращает словарь (нетерминал, начало) -> множество концов
+        выведенных из него отрезков входа.
+        """
+        n = len(self.input)
+        count = self.compiled.nonterminal_count
+        chart = [[] for _ in range(n + 1)]
+        seen = [set() for _ in range(n + 1)]
+        waiting = [{} for _ in range(n + 1)]
+        spans = {}
 
-            if success:
-                return True, remaining_string
+        def add(position, item):
+            if item not in seen[position]:
+                seen[position].add(item)
+                chart[position].append(item)
 
-            current_node.parent = None
+        for rule in self.rules_by_symbol[self.compiled.start]:
+            add(0, (rule, 0, 0))
 
-        return False, input_string
+        for position in range(n + 1):
+            items = chart[position]
+            index = 0
+            while index < len(items):
+                rule, dot, origin = items[index]
+                index += 1
+                lhs, rhs = self.rules[rule]
+
+                if dot == len(rhs):
+                    ends = spans.setdefault((lhs, origin), set())
+                    if position in ends:
+                        continue
+                    ends.add(position)
+                    for rule2, dot2, origin2 in waiting[origin].get(lhs, []):
+                        add(position, (rule2, dot2 + 1, origin2))
+                    continue
+
+                symbol = rhs[dot]
+                if symbol < count:
+                    waiting[position].setdefault(symbol, []).append((rule, dot, origin))
+                    for predicted in self.rules_by_symbol[symbol]:
+                        add(position, (predicted, 0, position))
+                    if self.nullable[symbol] or position in spans.get((symbol, position), ()):
+                        add(position, (rule, dot + 1, origin))
+                else:
+                    end = self._match_terminal(symbol, position)
+                    if end >= 0:
+                        add(end, (rule, dot + 1, origin))
+        return spans
+
+    def _cyk(self):
+        """
+        Распознаватель CYK для грамматик в НФХ. Возвращает словарь того же
+        вида, что и _earley.
+        """
+        n = len(self.input)
+        spans = {}
+        table = {}
+        terminal_rules = {}
+        binary_rules = {}
+        for lhs, rhs in self.rules:
+            if len(rhs) == 1:
+                terminal_rules.setdefault(rhs[0], []).append(lhs)
+            elif len(rhs) == 2:
+                binary_rules.setdefault(rhs, []).append(lhs)
+            else:
+                spans.setdefault((lhs, 0), set()).add(0)
+
+        for i in range(n):
+            cell = set()
+            for terminal, symbols in terminal_rules.items():
+                if self._match_terminal(terminal, i) == i + 1:
+                    cell.update(symbols)
+            table[(i, i + 1)] = cell
+
+        for length in range(2, n + 1):
+            for i in range(n - length + 1):
+                j = i + length
+                cell = set()
+                for k in range(i + 1, j):
+                    left = table[(i, k)]
+                    right = table[(k, j)]
+                    if not left or not right:
+                        continue
+                    for b in left:
+                        for c in right:
+                            cell.update(binary_rules.get((b, c), ()))
+                table[(i, j)] = cell
+
+        for (i, j), cell in table.items():
+            for symbol in cell:
+                spans.setdefault((symbol, i), set()).add(j)
+        return spans
+
+    def derivations(self, item):
+        """
+        Узел упакованного леса разбора: все способы вывести отрезок
+        item = (нетерминал, начало, конец) - пары (номер правила, отрезки
+        символов правой части). Вычисляется лениво и запоминается.
+        """
+        derivations = self.forest.get(item)
+        if derivations is None:
+            symbol, start, end = item
+            derivations = [
+                (rule, children)
+                for rule in self.rules_by_symbol[symbol]
+                for children in self._splits(self.rules[rule][1], start, end)
+            ]
+            self.forest[item] = derivations
+        return derivations
+
+    def _splits(self, rhs, start, end):
+        """
+        Разбиения отрезка [start, end) между символами rhs. На каждом шаге
+        граница ищется с того края, где кандидатов меньше: концы первого
+        символа по индексу spans или начала последнего по индексу starts,
+        поэтому и лево-, и праворекурсивные правила раскрываются без
+        перебора всех отрезков.
+        """
+        if not rhs:
+            if start == end:
+                yield ()
+            return
+        first, last = rhs[0], rhs[-1]
+        if len(rhs) == 1:
+            if self._spans_exactly(first, start, end):
+                yield ((first, start, end),)
+            return
+
+        ends = self._ends_from(first, start)
+        starts = self._starts_to(last, end)
+        if len(ends) <= len(starts):
+            for middle in sorted(m for m in ends if m <= end):
+                for rest in self._splits(rhs[1:], middle, end):
+                    yield ((first, start, middle),) + rest
+        else:
+            for middle in sorted(m for m in starts if m >= start):
+                for rest in self._splits(rhs[:-1], start, middle):
+                    yield rest + ((last, middle, end),)
+
+    def _ends_from(self, symbol, start):
+        """Концы выведенных из символа отрезков, начинающихся в start."""
+        if symbol < self.compiled.nonterminal_count:
+            return self.spans.get((symbol, start), ())
+        end = self._match_terminal(symbol, start)
+        return (end,) if end >= 0 else ()
+
+    def _starts_to(self, symbol, end):
+        """Начала выведенных из символа отрезков, оканчивающихся в end."""
+        if symbol < self.compiled.nonterminal_count:
+            return self.starts.get((symbol, end), ())
+        start = self._terminal_start(symbol, end)
+        return (start,) if start >= 0 else ()
+
+    def _spans_exactly(self, symbol, start, end):
+        if symbol < self.compiled.nonterminal_count:
+            return end in self.spans.get((symbol, start), ())
+        return self._match_terminal(symbol, start) == end
+
+    def _build_first_tree(self, root_item):
+        """
+        Построение одного дерева из леса сверху вниз: лес раскрывается
+        только вдоль выбранного дерева. Каждый отрезок леса выводим, поэтому
+        зациклиться можно лишь через отрезки с теми же границами (A -> B,
+        B -> A или соседи, выводящие ε); выводы таких отрезков выбираются
+        в _choose.
+        """
+        count = self.compiled.nonterminal_count
+        chosen = {}
+        # Корень дублирует начальный символ, как и раньше
+        tree = ParseTree()
+        stack = [(root_item, tree.add(-1, self.start_symbol, root_item[1], root_item[2]))]
+        while stack:
+            item, parent = stack.pop()
+            index = tree.add(parent, self.symbols[item[0]], item[1], item[2])
+            if item[0] < count:
+                if item not in chosen:
+                    self._choose(item, chosen)
+                _, children = self.derivations(item)[chosen[item]]
+                for child in reversed(children):
+                    stack.append((child, index))
+        return tree
+
+    def _choose(self, item, chosen):
+        """
+        Выбор вывода для item и для всех ещё не выбранных отрезков с теми же
+        границами, достижимых из него. Вывод выбирается, когда все его
+        дети с теми же границами уже имеют выбранный вывод (обоснование
+        снизу вверх), поэтому выбранные выводы не образуют циклов.
+        """
+        count = self.compiled.nonterminal_count
+        _, start, end = item
+
+        def same_span(child):
+            return child[0] < count and child[1] == start and child[2] == end
+
+        group = [item]
+        members = {item}
+        for member in group:
+            for _, children in self.derivations(member):
+                for child in children:
+                    if same_span(child) and child not in members and child not in chosen:
+                        members.add(child)
+                        group.append(child)
+
+        changed = True
+        while changed:
+            changed = False
+            for member in group:
+                if member in chosen:
+                    continue
+                for index, (_, children) in enumerate(self.derivations(member)):
+                    if all(not same_span(child) or child in chosen for child in children):
+                        chosen[member] = index
+                        changed = True
+                        break
+
+    def iter_trees(self):
+        """Ленивый перебор всех деревьев разбора последней разобранной строки."""
+        n = len(self.input) if self.input is not None else 0
+        if self.input is None or n not in self.spans.get((self.compiled.start, 0), ()):
+            return
+        for tree in self._trees((self.compiled.start, 0, n), frozenset()):
+            root = Node(self.start_symbol)
+            self._attach(tree, root)
+            yield root
+
+    def _trees(self, item, path):
+        """Деревья отрезка в виде (символ, поддеревья); path исключает циклы."""
+        name = self.symbols[item[0]]
+        if item[0] >= self.compiled.nonterminal_count:
+            yield name, ()
+            return
+        path = path | {item}
+        for _, children in self.derivations(item):
+            if any(child in path for child in children):
+                continue
+            yield from ((name, subtrees) for subtrees in self._child_trees(children, 0, path))
+
+    def _child_trees(self, children, index, path):
+        if index == len(children):
+            yield ()
+            return
+        for tree in self._trees(children[index], path):
+            for rest in self._child_trees(children, index + 1, path):
+                yield (tree,) + rest
+
+    def _attach(self, tree, parent):
+        symbol, subtrees = tree
+        node = Node(symbol, parent=parent)
+        for subtree in subtrees:
+            self._attach(subtree, node)
 
     def render_tree(self):
         if not self.tree_root:
@@ -45,40 +922,46 @@ class ParseTreeGenerator:
                 print(f"{pre}{node.name}")
 
     def save_tree_to_csv(self, file_path):
-        if not self.tree_root:
+        if not self.tree:
             print("Дерево разбора отсутствует. Нечего сохранять.")
             return
 
+        # Запись напрямую из массивов дерева (в прямом порядке обхода)
+        tree = self.tree
         with open(file_path, mode='w', newline='', encoding='utf-8') as file:
             writer = csv.writer(file)
             writer.writerow(["Parent", "Node"])
-            for node in self.tree_root.descendants:
-                writer.writerow([node.parent.name if node.parent else "", node.name])
+            for index in range(1, len(tree)):
+                writer.writerow([tree.name(tree.parent[index]), tree.name(index)])
 
 
+if __name__ == "__main__":
+    grammar = {
+        "S": [["A", "B"]],
+        "A": [["a"]],
+        "B": [["b", "C"]],
+        "C": [["c"]]
+    }
 
-grammar = {
-    "S": [["A", "B"]],
-    "A": [["a"]],
-    "B": [["b", "C"]],
-    "C": [["c"]]
-}
+    start_symbol = "S"
+    input_string = "abc"
 
-start_symbol = "S"
-input_string = "abc"
+    # Создаём генератор дерева разбора
+    parser = ParseTreeGenerator(grammar, start_symbol)
 
-# Создаём генератор дерева разбора
-parser = ParseTreeGenerator(grammar, start_symbol)
+    # Парсим строку
+    if parser.parse(input_string):
+        print("Строка разобрана успешно.")
+        print("Дерево разбора:")
+        parser.render_tree()
 
-# Парсим строку
-if parser.parse(input_string):
-    print("Строка разобрана успешно.")
-    print("Дерево разбора:")
-    parser.render_tree()
+        # Сохраняем дерево в CSV
+        csv_file = "parse_tree.csv"
+        parser.save_tree_to_csv(csv_file)
+        print(f"Дерево разбора сохранено в {csv_file}.")
+    else:
+        print("Ошибка разбора строки.")
 
-    # Сохраняем дерево в CSV
-    csv_file = "parse_tree.csv"
-    parser.save_tree_to_csv(csv_file)
-    print(f"Дерево разбора сохранено в {csv_file}.")
-else:
-    print("Ошибка разбора строки.")
+    # Та же проверка МП-автоматом, построенным по грамматике
+    pda = parser.compiled.to_pda()
+    print(f"МП-автомат допускает строку: {pda.accepts(input_string)}")
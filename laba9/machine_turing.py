@@ -1,33 +1,498 @@
 import csv
+import os
+import sys
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Итог прогона машины
+ACCEPTED = "accepted"  # достигнуто конечное состояние
+HALTED = "halted"  # нет перехода
+BUDGET_EXHAUSTED = "budget-exhausted"  # исчерпан лимит шагов или времени
+LOOPING = "looping"  # обнаружен бесконечный цикл (только run_macro без лимита шагов)
+
+
+class Tape:
+    # Лента, бесконечная в обе стороны. Символы хранятся номерами в байтах
+    # (0 - пустой символ, не больше 256 различных символов). Плотный режим -
+    # bytearray со смещением нулевой позиции, растущий геометрически в обе
+    # стороны; разреженный - словарь страниц для машин, уходящих далеко.
+    def __init__(self, content="", blank="_", sparse=False, page_size=4096, symbols=None):
+        self.blank = blank
+        # Таблица символов (номер -> символ) может задаваться заранее, чтобы
+        # номера совпадали с номерами скомпилированной машины
+        self.symbols = list(symbols) if symbols else [blank]
+        self.symbol_ids = {symbol: index for index, symbol in enumerate(self.symbols)}
+        self.sparse = sparse
+        self.page_size = page_size
+        self.cells = bytearray()  # плотный режим
+        self.offset = 0  # индекс позиции 0 в cells
+        self.pages = {}  # разреженный режим: номер страницы -> bytearray
+        # Границы записанной части ленты [low, high)
+        self.low = 0
+        self.high = 0
+        for position, symbol in enumerate(content):
+            self[position] = symbol
+
+    def symbol_id(self, symbol):
+        symbol_id = self.symbol_ids.get(symbol)
+        if symbol_id is None:
+            if len(self.symbols) == 256:
+                raise ValueError("На ленте не может быть больше 256 различных символов")
+            symbol_id = self.symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return symbol_id
+
+    def read(self, position):
+        # Номер символа в позиции; незаписанные клетки пусты
+        if self.sparse:
+            page = self.pages.get(position // self.page_size)
+            return page[position % self.page_size] if page is not None else 0
+        index = position + self.offset
+        if 0 <= index < len(self.cells):
+            return self.cells[index]
+        return 0
+
+    def write(self, position, symbol_id):
+        if self.sparse:
+            number, index = divmod(position, self.page_size)
+            page = self.pages.get(number)
+            if page is None:
+                page = self.pages[number] = bytearray(self.page_size)
+            page[index] = symbol_id
+        else:
+            index = position + self.offset
+            if index < 0:
+                # Рост влево не меньше текущего размера: амортизированно O(1)
+                grow = max(-index, len(self.cells))
+                self.cells[0:0] = bytes(grow)
+                self.offset += grow
+                index += grow
+            elif index >= len(self.cells):
+                self.cells.extend(bytes(max(index - len(self.cells) + 1, len(self.cells))))
+            self.cells[index] = symbol_id
+        if self.low == self.high:
+            self.low, self.high = position, position + 1
+        elif position < self.low:
+            self.low = position
+        elif position >= self.high:
+            self.high = position + 1
+
+    def write_run(self, position, symbol_id, count):
+        # Запись count одинаковых символов начиная с position. Крайние
+        # клетки записываются обычным образом: лента растёт и обновляются
+        # границы записанной части
+        if count <= 0:
+            return
+        self.write(position, symbol_id)
+        self.write(position + count - 1, symbol_id)
+        if self.sparse:
+            end = position + count
+            while position < end:
+                number, index = divmod(position, self.page_size)
+                length = min(end - position, self.page_size - index)
+                page = self.pages.get(number)
+                if page is None:
+                    page = self.pages[number] = bytearray(self.page_size)
+                page[index:index + length] = bytes([symbol_id]) * length
+                position += length
+        else:
+            index = position + self.offset
+            self.cells[index:index + count] = bytes([symbol_id]) * count
+
+    def __getitem__(self, position):
+        return self.symbols[self.read(position)]
+
+    def __setitem__(self, position, symbol):
+        self.write(position, self.symbol_id(symbol))
+
+    def __len__(self):
+        return self.high - self.low
+
+    def __iter__(self):
+        # Символы записанной части ленты слева направо
+        symbols = self.symbols
+        for position in range(self.low, self.high):
+            yield symbols[self.read(position)]
+
+    def __str__(self):
+        return "".join(self)
+
+
+# Лента в сжатом виде (RLE) для run_macro: клетка под головкой и два стека
+# блоков [символ, длина] слева и справа от неё; вершина стека (конец
+# списка) - ближайший к головке блок. За дном стека лента пуста, поэтому
+# пустой блок на дно никогда не кладётся.
+def _push_run(stack, symbol, count):
+    if stack and stack[-1][0] == symbol:
+        stack[-1][1] += count
+    elif stack or symbol:
+        stack.append([symbol, count])
+
+
+def _pop_cell(stack):
+    if not stack:
+        return 0
+    top = stack[-1]
+    top[1] -= 1
+    if not top[1]:
+        stack.pop()
+    return top[0]
+
+
+def _drop_cells(stack, count):
+    while count and stack:
+        top = stack[-1]
+        taken = min(count, top[1])
+        top[1] -= taken
+        count -= taken
+        if not top[1]:
+            stack.pop()
+
+
+def _window(stack, width):
+    # Блоки стека, ближайшие к головке, в сумме не больше width клеток
+    # (дальний блок обрезается), и признак того, что окно покрывает весь
+    # стек, то есть за окном лента пуста
+    blocks = []
+    for index in range(len(stack) - 1, -1, -1):
+        symbol, count = stack[index]
+        if count > width:
+            blocks.append((symbol, width))
+            return tuple(blocks), False
+        blocks.append((symbol, count))
+        width -= count
+        if not width:
+            return tuple(blocks), index == 0
+    return tuple(blocks), True
+
+
+def _width(blocks):
+    return sum(count for _, count in blocks)
+
+
+class RunResult:
+    __slots__ = ("status", "steps", "head", "state")
+
+    def __init__(self, status, steps, head, state):
+        self.status = status  # ACCEPTED, HALTED или BUDGET_EXHAUSTED
+        self.steps = steps  # число выполненных шагов
+        self.head = head  # позиция головки
+        self.state = state  # состояние машины после прогона
+
+    def __repr__(self):
+        return f"RunResult(status={self.status!r}, steps={self.steps}, head={self.head}, state={self.state!r})"
+
+
+class CompiledMachine:
+    # Состояния и символы заменены номерами (начальное состояние - 0, пустой
+    # символ - 0), а переходы разложены в плоские массивы по индексу
+    # (номер состояния << 8) | номер символа: записываемый символ, сдвиг
+    # головки и следующее состояние (-1 - перехода нет).
+    def __init__(self, transitions, initial_state, final_states, blank="_"):
+        self.blank = blank
+        self.symbols = [blank]
+        self.symbol_ids = {blank: 0}
+        self.states = []
+        self.state_ids = {}
+        self.state_id(initial_state)
+        for (state, symbol), (new_symbol, move, new_state) in transitions.items():
+            self.state_id(state)
+            self.state_id(new_state)
+            self.symbol_id(symbol)
+            self.symbol_id(new_symbol)
+        for state in final_states:
+            self.state_id(state)
+
+        size = len(self.states) << 8
+        self.write = bytearray(size)
+        self.delta = array("b", bytes(size))
+        self.next = array("i", [-1]) * size
+        self.final = bytearray(len(self.states))
+        for (state, symbol), (new_symbol, move, new_state) in transitions.items():
+            index = self.state_ids[state] << 8 | self.symbol_ids[symbol]
+            self.write[index] = self.symbol_ids[new_symbol]
+            self.delta[index] = 1 if move == "R" else -1
+            self.next[index] = self.state_ids[new_state]
+        for state in final_states:
+            self.final[self.state_ids[state]] = 1
+
+    def state_id(self, state):
+        state_id = self.state_ids.get(state)
+        if state_id is None:
+            state_id = self.state_ids[state] = len(self.states)
+            self.states.append(state)
+        return state_id
+
+    def symbol_id(self, symbol):
+        symbol_id = self.symbol_ids.get(symbol)
+        if symbol_id is None:
+            if len(self.symbols) == 256:
+                raise ValueError("На ленте не может быть больше 256 различных символов")
+            symbol_id = self.symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return symbol_id
+
+    def make_tape(self, content="", sparse=False):
+        return Tape(content, self.blank, sparse, symbols=self.symbols)
+
+    def run(self, tape, state, head=0, max_steps=None, timeout=None):
+        # Прогон с состояния state (номер) и позиции head. Время проверяется
+        # раз в check_every шагов, чтобы не замедлять основной цикл.
+        check_every = 1 << 16
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        steps = 0
+        status = None
+        while status is None:
+            if self.final[state]:
+                status = ACCEPTED
+                break
+            chunk = check_every if max_steps is None else min(check_every, max_steps - steps)
+            if chunk <= 0 or (deadline is not None and steps and time.monotonic() >= deadline):
+                status = BUDGET_EXHAUSTED
+                break
+            if tape.sparse:
+                state, head, done, status = self._run_sparse(tape, state, head, chunk)
+            else:
+                state, head, done, status = self._run_dense(tape, state, head, chunk)
+            steps += done
+        return RunResult(status, steps, head, self.states[state])
+
+    def _run_dense(self, tape, state, head, count):
+        # Не больше count шагов по плотной ленте; возвращает
+        # (состояние, головка, число шагов, итог или None)
+        write, delta, next_state, final = self.write, self.delta, self.next, self.final
+        cells = tape.cells
+        offset = tape.offset
+        size = len(cells)
+        low = high = None  # границы записанных в этом отрезке позиций
+        status = None
+        done = 0
+        while done < count:
+            if final[state]:
+                status = ACCEPTED
+                break
+            index = head + offset
+            inside = 0 <= index < size
+            row = state << 8 | (cells[index] if inside else 0)
+            target = next_state[row]
+            if target < 0:
+                status = HALTED
+                break
+            if inside:
+                cells[index] = write[row]
+                if low is None:
+                    low = high = head
+                elif head < low:
+                    low = head
+                elif head > high:
+                    high = head
+            else:
+                tape.write(head, write[row])
+                offset = tape.offset
+                size = len(cells)
+            head += delta[row]
+            state = target
+            done += 1
+        if low is not None:
+            tape.write(low, cells[low + offset])
+            tape.write(high, cells[high + offset])
+        return state, head, done, status
+
+    def run_macro(self, tape, state, head=0, max_steps=None, timeout=None,
+                  max_configurations=100000, sample_every=16, window=64):
+        # Ускоренный прогон по сжатой ленте с тем же результатом, что и run.
+        # Если переход не меняет состояние, машина проходит весь блок
+        # одинаковых символов в своём направлении, и такой проход выполняется
+        # за одну операцию.
+        #
+        # Раз в sample_every макрошагов запоминается снимок (не больше
+        # max_configurations): состояние, символ под головкой и по window
+        # клеток ленты с каждой стороны относительно головки. Повтор снимка
+        # означает бесконечный цикл, если между снимками головка не выходила
+        # за окно (или за окном пусто) и, при сдвиге головки, лента в сторону
+        # движения за окном пуста - тогда каждый следующий период повторяет
+        # предыдущий со сдвигом. Такой цикл, как и проход в бесконечную
+        # пустую часть ленты, без лимита шагов даёт LOOPING. С лимитом
+        # целые периоды цикла без сдвига пропускаются: конфигурация после
+        # них та же, а цикл со сдвигом исполняется до исчерпания лимита.
+        write, delta, next_state, final = self.write, self.delta, self.next, self.final
+        left, cur, right = self._runs_from_tape(tape, head)
+        low, high = tape.low, tape.high  # границы записанной части ленты
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        seen = {}  # снимок -> (шаг, головка, номер отрезка в reach)
+        reach = []  # [наименьшая, наибольшая] посещённые клетки между снимками
+        lowest = highest = head
+        detect = max_configurations > 0
+        steps = 0
+        macro_steps = 0
+        status = None
+        while True:
+            if final[state]:
+                status = ACCEPTED
+                break
+            if max_steps is not None and steps >= max_steps:
+                status = BUDGET_EXHAUSTED
+                break
+            row = state << 8 | cur
+            target = next_state[row]
+            if target < 0:
+                status = HALTED
+                break
+
+            macro_steps += 1
+            if not macro_steps & 0xFFF and deadline is not None and time.monotonic() >= deadline:
+                status = BUDGET_EXHAUSTED
+                break
+            if detect and not macro_steps % sample_every:
+                reach.append((lowest, highest))
+                lowest = highest = head
+                left_window, left_full = _window(left, window)
+                right_window, right_full = _window(right, window)
+                key = (state, cur, left_window, left_full, right_window, right_full)
+                previous = seen.get(key)
+                if previous is not None:
+                    previous_steps, previous_head, index = previous
+                    shift = head - previous_head
+                    visited = reach[index:]
+                    # Клетки за окном, прочитанные между снимками, должны быть пусты
+                    inside = (
+                        (left_full or min(r[0] for r in visited) >= previous_head - _width(left_window))
+                        and (right_full or max(r[1] for r in visited) <= previous_head + _width(right_window))
+                    )
+                    if inside and (shift == 0 or (right_full if shift > 0 else left_full)):
+                        if max_steps is None:
+                            status = LOOPING
+                            break
+                        detect = False
+                        if shift == 0:
+                            # Конфигурация повторяется с периодом steps - previous_steps
+                            period = steps - previous_steps
+                            steps += (max_steps - steps) // period * period
+                            continue
+                if previous is None and len(seen) >= max_configurations:
+                    # Таблица снимков заполнена: поиск циклов прекращается
+                    detect = False
+                else:
+                    seen[key] = steps, head, len(reach)
+
+            symbol = write[row]
+            move = delta[row]
+            ahead, behind = (right, left) if move > 0 else (left, right)
+            if target == state:
+                # Проход по блоку символов cur
+                if not cur and not ahead:
+                    if max_steps is None:
+                        status = LOOPING
+                        break
+                    count = max_steps - steps
+                else:
+                    count = 1 + (ahead[-1][1] if ahead and ahead[-1][0] == cur else 0)
+                    if max_steps is not None:
+                        count = min(count, max_steps - steps)
+                _drop_cells(ahead, count - 1)
+            else:
+                count = 1
+            _push_run(behind, symbol, count)
+            cur = _pop_cell(ahead)
+
+            # Записаны клетки от head до head + move * (count - 1)
+            first, last = (head, head + count - 1) if move > 0 else (head - count + 1, head)
+            if low == high:
+                low, high = first, last + 1
+            else:
+                low = min(low, first)
+                high = max(high, last + 1)
+            head += move * count
+            state = target
+            steps += count
+            lowest = min(lowest, first)
+            highest = max(highest, last)
+
+        self._runs_to_tape(tape, left, cur, right, head, low, high)
+        return RunResult(status, steps, head, self.states[state])
+
+    @staticmethod
+    def _runs_from_tape(tape, head):
+        left = []
+        for position in range(min(tape.low, head), head):
+            _push_run(left, tape.read(position), 1)
+        right = []
+        for position in range(max(tape.high, head + 1) - 1, head, -1):
+            _push_run(right, tape.read(position), 1)
+        return left, tape.read(head), right
+
+    @staticmethod
+    def _runs_to_tape(tape, left, cur, right, head, low, high):
+        # Перенос сжатой ленты обратно в tape в пределах [low, high)
+        def store(first, symbol, count):
+            last = min(first + count, high)
+            first = max(first, low)
+            tape.write_run(first, symbol, last - first)
+
+        position = head
+        for symbol, count in reversed(left):
+            position -= count
+            store(position, symbol, count)
+        store(low, 0, position - low)
+        store(head, cur, 1)
+        position = head + 1
+        for symbol, count in reversed(right):
+            store(position, symbol, count)
+            position += count
+        store(position, 0, high - position)
+        tape.low, tape.high = low, high
+
+    def _run_sparse(self, tape, state, head, count):
+        write, delta, next_state, final = self.write, self.delta, self.next, self.final
+        read_cell, write_cell = tape.read, tape.write
+        status = None
+        done = 0
+        while done < count:
+            if final[state]:
+                status = ACCEPTED
+                break
+            row = state << 8 | read_cell(head)
+            target = next_state[row]
+            if target < 0:
+                status = HALTED
+                break
+            write_cell(head, write[row])
+            head += delta[row]
+            state = target
+            done += 1
+        return state, head, done, status
 
 
 class TuringMachine:
-    def __init__(self, tape, transitions, initial_state, final_states):
-        self.tape = list(
-            tape
-        )  # преобразуем строку в список для возможности модификации
-        self.head = 0  # позиция головки
-        self.state = initial_state  # начальное состояние
+    def __init__(self, tape, transitions, initial_state, final_states, blank="_", sparse=False):
         self.transitions = transitions  # словарь переходов
         self.final_states = final_states  # конечные состояния
+        self.compiled = CompiledMachine(transitions, initial_state, final_states, blank)
+        self.tape = self.compiled.make_tape(tape, sparse)  # лента, бесконечная в обе стороны
+        self.head = 0  # позиция головки
+        self.state = initial_state  # начальное состояние
+
+    def run(self, max_steps=None, timeout=None):
+        # Прогон до конечного состояния, отсутствия перехода или исчерпания
+        # лимита шагов (max_steps) или времени в секундах (timeout). Повторный
+        # вызов продолжает работу с места остановки.
+        compiled = self.compiled
+        result = compiled.run(self.tape, compiled.state_ids[self.state], self.head, max_steps, timeout)
+        self.head = result.head
+        self.state = result.state
+        return result
 
-    def run(self):
-        while self.state not in self.final_states:  # пока не в конечном состоянии
-            current_symbol = self.tape[self.head]  # символ на текущей позиции
-            if (self.state, current_symbol) not in self.transitions:
-                print("Нет перехода, программа остановлена.")
-                return
-            action = self.transitions[(self.state, current_symbol)]
-            new_symbol, move, new_state = (
-                action  # определение нового символа, движения и состояния
-            )
-            self.tape[self.head] = new_symbol  # записываем новый символ
-            self.head += (
-                1 if move == "R" else -1
-            )
-            self.state = new_state
-
-        print("Программа завершена.")
+    def run_macro(self, max_steps=None, timeout=None):
+        # То же, что run, но с макрошагами по сжатой ленте (см.
+        # CompiledMachine.run_macro); бесконечный цикл без лимита шагов
+        # завершается со статусом LOOPING
+        compiled = self.compiled
+        result = compiled.run_macro(self.tape, compiled.state_ids[self.state], self.head, max_steps, timeout)
+        self.head = result.head
+        self.state = result.state
+        return result
 
 
 def load_transitions_from_csv(filename):
@@ -45,16 +510,95 @@ def load_transitions_from_csv(filename):
     return transitions
 
 
-if __name__ == "__main__":
-    tape = input("Введите содержимое ленты: ")
+def load_tapes(source):
+    # Ленты из файла (имя файла) или из итератора строк в формате CSV:
+    # содержимое ленты и, необязательно, лимит шагов для неё
+    if isinstance(source, str):
+        with open(source, "r", newline="") as f:
+            yield from load_tapes(f)
+        return
+    for row in csv.reader(source):
+        if len(row) > 1 and row[1]:
+            yield row[0], int(row[1])
+        else:
+            yield row[0] if row else ""
+
+
+# Скомпилированная машина в процессе-исполнителе пакетного прогона
+_worker_machine = None
+_worker_macro = False
+
+
+def _init_worker(compiled, macro):
+    # Таблица переходов передаётся в процесс один раз
+    global _worker_machine, _worker_macro
+    _worker_machine = compiled
+    _worker_macro = macro
+
+
+def _run_tapes(batch):
+    compiled = _worker_machine
+    run = compiled.run_macro if _worker_macro else compiled.run
+    results = []
+    for content, max_steps in batch:
+        tape = compiled.make_tape(content)
+        result = run(tape, 0, 0, max_steps)
+        results.append((result, "".join(tape)))
+    return results
 
+
+def _tape_batches(tapes, max_steps, batch_size):
+    batch = []
+    for tape in tapes:
+        # Лента - строка или пара (строка, лимит шагов)
+        batch.append(tape if isinstance(tape, tuple) else (tape, max_steps))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_batch(transitions, initial_state, final_states, tapes, max_steps=None, workers=None,
+              blank="_", batch_size=64, window=None, macro=False):
+    # Прогон машины на множестве лент в пуле процессов. Ленты читаются из
+    # итератора по мере надобности: в работе не больше window пакетов по
+    # batch_size лент. Выдаёт пары (RunResult, лента после прогона) в
+    # исходном порядке лент. macro=True включает run_macro.
+    compiled = CompiledMachine(transitions, initial_state, final_states, blank)
+    workers = workers or os.cpu_count() or 1
+    window = window or 2 * workers
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(compiled, macro)) as executor:
+        pending = deque()
+        for batch in _tape_batches(tapes, max_steps, batch_size):
+            pending.append(executor.submit(_run_tapes, batch))
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+if __name__ == "__main__":
     path = "C:\\Users\\artyo\\PycharmProjects\\AppliedAlgorithms2\\laba9\\input_file.csv"
     transitions = load_transitions_from_csv(path)
 
     initial_state = "q0"
     final_states = {"q2"}
 
+    if len(sys.argv) > 1:
+        # Пакетный режим: ленты из файла, по одной на строку
+        for result, tape in run_batch(transitions, initial_state, final_states, load_tapes(sys.argv[1])):
+            print(f"{result.status}\t{result.steps}\t{tape}")
+        sys.exit()
+
+    tape = input("Введите содержимое ленты: ")
     tm = TuringMachine(tape, transitions, initial_state, final_states)
-    tm.run()
+    result = tm.run()
+    if result.status == ACCEPTED:
+        print(f"Программа завершена за {result.steps} шагов.")
+    elif result.status == HALTED:
+        print("Нет перехода, программа остановлена.")
+    else:
+        print("Превышен лимит шагов, программа остановлена.")
 
     print("Лента после выполнения:", "".join(tm.tape))